@@ -0,0 +1,124 @@
+"""
+BenchmarkEngines.py
+
+Compare the running time per time stamp of the engines of FindActivePaths.py on small-world graphs with the graphP
+values and densities of Running Time Data/DataPerGraph.txt.
+
+How it works:
+
+    For each graphP, a Watts-Strogatz graph of --nodes nodes and --k neighbours per node is generated in memory (nothing
+    is written to disk). For each density, --repeat time stamps are drawn, each with round(density * N) active nodes
+    chosen uniformly at random, and every engine finds the component id of each active node of each time stamp (the
+    labels output mode, so that no engine pays for building component sets).
+
+    The median running time per time stamp is printed in the format of DataPerGraph.txt, one line per engine, followed
+    by the fastest engine of that graph and density:
+
+        GraphN = <N>, GraphK = <K>, graphP = <P>, density = <density>, engine = <engine>, running time = <ms> ms
+        ...
+        fastest = <engine>
+
+    Engines:
+        bfs:       the bfs engine as run by FindActivePaths.py (set BFS, or frontier BFS for dense time stamps)
+        frontier:  frontierBfsLabels at every density (top-down levels only)
+        diropt:    directionOptimizingLabels (top-down and bottom-up levels)
+        unionfind: unionFindLabels
+        labelprop: labelPropagationLabels
+
+Usage:
+    python3 BenchmarkEngines.py [--nodes N] [--k K] [--p P [P ...]] [--densities D [D ...]] [--repeat R] [--seed SEED]
+                                [--engines ENGINE [ENGINE ...]]
+"""
+import argparse
+import statistics
+import timeit
+
+import networkx as nx
+import numpy as np
+
+from CSRGraph import CSRGraph
+from FindActivePaths import bfsLabels, directionOptimizingLabels, frontierBfsLabels, labelPropagationLabels, \
+    unionFindLabels
+
+# Engines by name, each a function (original G, active nodes) -> component id of each active node
+ENGINES = {'bfs': bfsLabels, 'frontier': frontierBfsLabels, 'diropt': directionOptimizingLabels,
+           'unionfind': unionFindLabels, 'labelprop': labelPropagationLabels}
+
+# graphP values and densities of Running Time Data/DataPerGraph.txt
+GRAPH_P = [0.001, 0.01, 0.1]
+DENSITIES = [0.05, 0.1, 0.2, 0.3, 0.4, 0.5]
+
+# Engines compared unless --engines is given. bfs is left out: below DENSE_BFS_THRESHOLD it runs the set BFS, which is
+# orders of magnitude slower than the others on graphs of this size.
+DEFAULT_ENGINES = ['frontier', 'diropt', 'unionfind', 'labelprop']
+
+
+def main():
+
+    args = parseArguments()
+
+    rng = np.random.default_rng(args.seed)
+
+    for probabilityP in args.p:
+        G = CSRGraph.fromNetworkx(nx.watts_strogatz_graph(n=args.nodes, k=args.k, p=probabilityP, seed=args.seed))
+
+        # Build the edge arrays of labelprop outside the timings. In FindActivePaths.py only the first time stamp pays
+        # for it.
+        G.edges()
+
+        for density in args.densities:
+            runningTimes = benchmarkDensity(G, density, args.repeat, args.engines, rng)
+
+            for engine in args.engines:
+                print("GraphN = " + str(args.nodes) + ", GraphK = " + str(args.k) + ", graphP = " + str(probabilityP) +
+                      ", density = " + str(density) + ", engine = " + engine + ", running time = " +
+                      str(runningTimes[engine]) + " ms")
+
+            print("fastest = " + min(args.engines, key=runningTimes.get))
+            print()
+
+
+# Parse command line arguments (see Usage)
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Compare the running time of the FindActivePaths engines')
+    parser.add_argument('--nodes', type=int, default=100000, help='number of nodes N (default: 100000)')
+    parser.add_argument('--k', type=int, default=8, help='number of neighbours per node K (default: 8)')
+    parser.add_argument('--p', type=float, nargs='+', default=GRAPH_P,
+                        help='edge rewiring probabilities (default: those of DataPerGraph.txt)')
+    parser.add_argument('--densities', type=float, nargs='+', default=DENSITIES,
+                        help='fractions of active nodes (default: those of DataPerGraph.txt)')
+    parser.add_argument('--repeat', type=int, default=5, help='number of time stamps per density (default: 5)')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the graph and of the active nodes')
+    parser.add_argument('--engines', choices=list(ENGINES), nargs='+', default=DEFAULT_ENGINES,
+                        help='engines to compare (default: ' + ' '.join(DEFAULT_ENGINES) + ')')
+    return parser.parse_args()
+
+
+# Time every engine on the same random time stamps.
+#
+# @param originalG graph, as a CSRGraph
+# @param density fraction of the nodes active at each time stamp
+# @param repeat number of time stamps
+# @param engines names of the engines to time, keys of ENGINES
+# @param rng numpy random Generator
+# @return dict engine -> median running time per time stamp, in ms
+def benchmarkDensity(originalG, density, repeat, engines, rng):
+    numOfNodes = originalG.number_of_nodes()
+    runningTimes = {engine: [] for engine in engines}
+
+    for _ in range(repeat):
+        activeNodes = rng.choice(numOfNodes, size=int(round(density * numOfNodes)), replace=False)
+        activeNodes.sort()
+
+        for engine in engines:
+            start = timeit.default_timer()
+            ENGINES[engine](originalG, activeNodes)
+            stop = timeit.default_timer()
+
+            runningTimes[engine].append((stop - start) * 1000)
+
+    return {engine: statistics.median(times) for engine, times in runningTimes.items()}
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+"""
+CSRGraph.py
+
+Compact compressed-sparse-row (CSR) representation of an undirected graph, used instead of a networkx graph when
+looking for active components.
+
+How it works:
+
+    Nodes are the integers 0 .. N - 1. These are the labels written to Graph.txt by GenerateGraph.py; other labels are
+    interned to such ids when Graph.txt is parsed (see NodeIds.py), and graph.nodeIds maps them back.
+    The neighbours of every node are stored back to back in one int32 array, sorted by node:
+
+        neighbours = [neighbours of 0 | neighbours of 1 | ... | neighbours of N - 1]
+
+    and offsets[node] .. offsets[node + 1] is the slice of that array holding the neighbours of node.
+
+    An undirected edge is stored once from each endpoint, so the graph takes (N + 1) * 4 + 2 * E * 4 bytes. For a
+    Watts-Strogatz graph with N = 10,000,000 and K = 8 that is ~360 MB, against many GB for a networkx graph.
+
+Binary graph cache:
+
+    Parsing Graph.txt takes minutes for large graphs, so the two arrays are also saved next to it in NumPy's .npy
+    format, together with a small JSON header:
+
+        <graph folder>/GraphOffsets.npy     offsets array
+        <graph folder>/GraphNeighbours.npy  neighbours array
+        <graph folder>/GraphHeader.json     {"N": .., "E": .., "K": .., "P": .., "minDegree": .., "maxDegree": ..,
+                                             "avgDegree": ..}
+        <graph folder>/GraphLabels.npy      node labels, only for graphs not labelled 0 .. N - 1
+
+    GenerateGraph.py writes the cache when it saves a graph. loadGraph memory-maps it, and builds it from Graph.txt
+    first if it is missing or older than Graph.txt.
+
+    The header doubles as machine-readable graph metadata: readGraphHeader returns it without touching the graph, so
+    tools that only need e.g. the number of nodes don't pay for loading the graph.
+"""
+import json
+import os
+import re
+from array import array
+
+import numpy as np
+
+from NodeIds import NodeIds
+
+# File names of the binary graph cache, inside the graph folder
+OFFSETS_FILE = 'GraphOffsets.npy'
+NEIGHBOURS_FILE = 'GraphNeighbours.npy'
+HEADER_FILE = 'GraphHeader.json'
+LABELS_FILE = 'GraphLabels.npy'
+
+
+class CSRGraph:
+
+    # @param offsets int array of length N + 1. The neighbours of node are neighbours[offsets[node]:offsets[node + 1]]
+    # @param neighbours int array of length 2 * E
+    # @param nodeIds NodeIds mapping node ids to the labels of the graph file. Defaults to labels 0 .. N - 1.
+    def __init__(self, offsets, neighbours, nodeIds=None):
+        self.offsets = offsets
+        self.neighbours = neighbours
+
+        # Number of nodes
+        self.numOfNodes = len(offsets) - 1
+
+        self.nodeIds = nodeIds if nodeIds is not None else NodeIds(self.numOfNodes)
+
+        # (sources, targets) of every edge, built on first use by edges()
+        self.edgeArrays = None
+
+    def number_of_nodes(self):
+        return self.numOfNodes
+
+    def number_of_edges(self):
+        return len(self.neighbours) // 2
+
+    # @return array of the neighbours of node. This is a view into the neighbours array, do not modify it.
+    def neighbors(self, node):
+        return self.neighbours[self.offsets[node]:self.offsets[node + 1]]
+
+    # Neighbours of many nodes at once, without a Python loop over the nodes.
+    #
+    # @param nodes int array of nodes
+    # @return int array of the neighbours of nodes[0], then those of nodes[1], ... (with repetitions)
+    def neighborsOf(self, nodes):
+        starts = self.offsets[nodes].astype(np.int64)
+        lengths = self.offsets[nodes + 1] - starts
+
+        # Index in the neighbours array of every entry of the result: entry j of the neighbours of nodes[i] is at
+        # starts[i] + j
+        firstEntries = np.cumsum(lengths) - lengths
+        positions = np.repeat(starts - firstEntries, lengths) + np.arange(lengths.sum())
+
+        return self.neighbours[positions]
+
+    def degree(self, node):
+        return int(self.offsets[node + 1] - self.offsets[node])
+
+    # @return array of the degree of every node
+    def degrees(self):
+        return np.diff(self.offsets)
+
+    # Every undirected edge once, as two arrays: edge i goes from sources[i] to targets[i], with
+    # sources[i] < targets[i]. Built from the CSR arrays the first time it is called (E * 8 bytes), then kept.
+    #
+    # @return (int32 array of sources, int32 array of targets)
+    def edges(self):
+        if self.edgeArrays is None:
+            sources = np.repeat(np.arange(self.numOfNodes, dtype=np.int32), self.degrees())
+            first = sources < self.neighbours
+
+            self.edgeArrays = (sources[first], np.asarray(self.neighbours)[first])
+
+        return self.edgeArrays
+
+    # Build a CSR graph from a networkx graph whose nodes are the integers 0 .. N - 1, e.g. nx.watts_strogatz_graph.
+    #
+    # @return CSRGraph
+    @classmethod
+    def fromNetworkx(cls, G):
+        edges = np.array(list(G.edges()), dtype=np.int32).reshape(-1, 2)
+        return cls.fromEdges(edges[:, 0], edges[:, 1], G.number_of_nodes())
+
+    # Build a CSR graph from the adjacency list written by networkx (nx.write_adjlist), without loading it in networkx.
+    # Each line lists a node followed by some of its neighbours. Every edge is listed once, lines starting with '#' are
+    # comments. Node labels are interned to ids 0 .. N - 1 (see NodeIds.py).
+    #
+    # @param path path of Graph.txt
+    # @return CSRGraph
+    @classmethod
+    def fromAdjlist(cls, path):
+        try:
+            # Integer labels, kept in compact arrays of C ints rather than lists of Python ints
+            nodes, sources, targets = readAdjlist(path, int, lambda: array('i'))
+        except ValueError:
+            nodes, sources, targets = readAdjlist(path, str, list)
+
+        numOfNodes, numOfEdges = len(nodes), len(sources)
+
+        # Intern every label at once. Nodes listed on their own line are included, even without neighbours.
+        nodeIds, ids = NodeIds.intern(np.concatenate((np.asarray(nodes), np.asarray(sources), np.asarray(targets))))
+
+        graph = cls.fromEdges(ids[numOfNodes:numOfNodes + numOfEdges], ids[numOfNodes + numOfEdges:],
+                              nodeIds.numOfNodes)
+        graph.nodeIds = nodeIds
+
+        return graph
+
+    # Build a CSR graph from two arrays of edge endpoints. Each undirected edge must be listed once.
+    #
+    # @param sources int array, sources[i] is the first endpoint of edge i
+    # @param targets int array, targets[i] is the second endpoint of edge i
+    # @param numOfNodes number of nodes N. Nodes are 0 .. N - 1
+    # @return CSRGraph
+    @classmethod
+    def fromEdges(cls, sources, targets, numOfNodes):
+        # Store every edge from both of its endpoints
+        allSources = np.concatenate((sources, targets))
+        allTargets = np.concatenate((targets, sources))
+
+        # int32 offsets hold up to 2^31 - 1 neighbour entries, i.e. ~1 billion edges. Fall back to int64 above that.
+        offsetType = np.int32 if len(allSources) < np.iinfo(np.int32).max else np.int64
+
+        # Group neighbours by node. A stable sort keeps each node's neighbours in the order they were listed.
+        order = np.argsort(allSources, kind='stable')
+        neighbours = allTargets[order].astype(np.int32)
+
+        offsets = np.zeros(numOfNodes + 1, dtype=offsetType)
+        np.cumsum(np.bincount(allSources, minlength=numOfNodes), out=offsets[1:])
+
+        return cls(offsets, neighbours)
+
+
+# Load the graph stored in a graph folder as a CSRGraph.
+# The binary cache is memory-mapped, so this takes about as long as opening the files. If the cache is missing or older
+# than Graph.txt, Graph.txt is parsed and the cache is written for next time.
+#
+# @param graphPath graph folder, containing Graph.txt
+# @return CSRGraph
+def loadGraph(graphPath):
+    textFile = os.path.join(graphPath, 'Graph.txt')
+    offsetsFile = os.path.join(graphPath, OFFSETS_FILE)
+    neighboursFile = os.path.join(graphPath, NEIGHBOURS_FILE)
+
+    cacheFiles = [offsetsFile, neighboursFile, os.path.join(graphPath, HEADER_FILE)]
+    isCached = all(os.path.exists(path) for path in cacheFiles)
+
+    # Rebuild the cache if Graph.txt has been replaced since it was written
+    if isCached and os.path.exists(textFile):
+        isCached = min(os.path.getmtime(path) for path in cacheFiles) >= os.path.getmtime(textFile)
+
+    if not isCached:
+        graph = CSRGraph.fromAdjlist(textFile)
+        numOfNeighbours, probabilityP = readGraphParameters(graphPath)
+        writeGraphCache(graph, graphPath, numOfNeighbours, probabilityP)
+
+    return CSRGraph(np.load(offsetsFile, mmap_mode='r'), np.load(neighboursFile, mmap_mode='r'), loadNodeIds(graphPath))
+
+
+# Read the node labels of a graph folder, without loading the graph.
+#
+# @param graphPath graph folder
+# @return NodeIds of the graph
+def loadNodeIds(graphPath):
+    numOfNodes = readGraphHeader(graphPath)['N']
+
+    labelsFile = os.path.join(graphPath, LABELS_FILE)
+    if not os.path.exists(labelsFile):
+        return NodeIds(numOfNodes)
+
+    return NodeIds(numOfNodes, np.load(labelsFile))
+
+
+# Read the metadata of the graph stored in a graph folder, without loading the graph.
+# Graph folders without a binary cache get one first (see loadGraph).
+#
+# @param graphPath graph folder
+# @return dict with keys N (number of nodes), E (number of edges), K (graphK), P (graphP), minDegree, maxDegree and
+#         avgDegree. K and P are None if unknown.
+def readGraphHeader(graphPath):
+    headerFile = os.path.join(graphPath, HEADER_FILE)
+
+    if not os.path.exists(headerFile):
+        loadGraph(graphPath)
+
+    with open(headerFile, 'r') as header:
+        return json.load(header)
+
+
+# Read the adjacency list written by networkx (see CSRGraph.fromAdjlist).
+#
+# @param path path of Graph.txt
+# @param parseLabel function converting a label of the file, e.g. int
+# @param newList function creating an empty list of labels
+# @return (labels of the nodes starting each line, labels of the first endpoint of each edge, labels of the second
+#         endpoint of each edge)
+def readAdjlist(path, parseLabel, newList):
+    nodes = newList()
+    sources = newList()
+    targets = newList()
+
+    with open(path, 'r') as graphFile:
+        for line in graphFile:
+            if line.startswith('#'):
+                continue
+
+            labels = line.split()
+            if len(labels) == 0:
+                continue
+
+            node = parseLabel(labels[0])
+            nodes.append(node)
+
+            for label in labels[1:]:
+                sources.append(node)
+                targets.append(parseLabel(label))
+
+    return nodes, sources, targets
+
+
+# Save a graph in the binary graph cache of a graph folder.
+#
+# @param graph CSRGraph
+# @param graphPath graph folder
+# @param numOfNeighbours number of neighbours per node before rewiring (graphK), or None if unknown
+# @param probabilityP rewiring probability (graphP), or None if unknown
+def writeGraphCache(graph, graphPath, numOfNeighbours, probabilityP):
+    np.save(os.path.join(graphPath, OFFSETS_FILE), graph.offsets)
+    np.save(os.path.join(graphPath, NEIGHBOURS_FILE), graph.neighbours)
+
+    # Labels are only stored if they are not the node ids themselves
+    labelsFile = os.path.join(graphPath, LABELS_FILE)
+    if not graph.nodeIds.isIdentity():
+        np.save(labelsFile, graph.nodeIds.labels)
+    elif os.path.exists(labelsFile):
+        os.remove(labelsFile)
+
+    degrees = graph.degrees()
+
+    header = {'N': graph.number_of_nodes(), 'E': graph.number_of_edges(), 'K': numOfNeighbours, 'P': probabilityP,
+              'minDegree': int(degrees.min()) if len(degrees) > 0 else 0,
+              'maxDegree': int(degrees.max()) if len(degrees) > 0 else 0,
+              'avgDegree': float(degrees.mean()) if len(degrees) > 0 else 0.0}
+
+    # Written last: its presence marks the cache as complete
+    with open(os.path.join(graphPath, HEADER_FILE), 'w') as headerFile:
+        json.dump(header, headerFile)
+
+
+# Recover graphK and graphP of a graph folder that has no cache yet, from GraphDetails.txt written by GenerateGraph.py.
+#
+# @return (graphK, graphP), each None if it can't be found
+def readGraphParameters(graphPath):
+    numOfNeighbours = None
+    probabilityP = None
+
+    detailsFile = os.path.join(graphPath, 'GraphDetails.txt')
+    if os.path.exists(detailsFile):
+        with open(detailsFile, 'r') as details:
+            for line in details:
+                if not line.startswith('#'):
+                    break
+
+                match = re.match(r"# Number of Neighbours per Node before Rewiring \(graphK\) = (\S+)", line)
+                if match:
+                    numOfNeighbours = int(match[1])
+
+                match = re.match(r"# Rewiring Probability \(graphP\) = (\S+)", line)
+                if match:
+                    probabilityP = float(match[1])
+
+    return numOfNeighbours, probabilityP
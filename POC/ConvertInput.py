@@ -0,0 +1,116 @@
+"""
+ConvertInput.py
+
+Convert an input file to another input file format (see InputFormats.py), e.g. an existing dense CSV matrix into an
+event stream for the incremental engine.
+
+The converted file is saved next to the original, with the same name and the extension of the new format.
+
+CSV files are streamed with FindActivePaths.readInputFile, --block-size time steps per pass, so converting a large
+CSV file does not load it as a whole.
+
+Usage:
+    python3 ConvertInput.py <graph folder name> <input file name> --format bits|sparse|events [--block-size BLOCK_SIZE]
+    e.g. python3 ConvertInput.py GRAPH_SW_N20_E80_P0.15_K8_T100 04-18--16-57-47-input.csv --format events
+"""
+import argparse
+import os
+
+from FindActivePaths import BLOCK_SIZE, readInputFile
+from InputFormats import EXTENSIONS, createWriter, openInputFile
+
+# Number of bytes read at a time when counting the rows of a CSV file
+COUNT_BUFFER_SIZE = 1 << 20
+
+
+def main():
+
+    args = parseArguments()
+
+    # Path of the input file
+    inputFilePath = args.graphPath + "/Data/" + args.fileName
+
+    # Path of the converted file: same name, new extension
+    outputFilePath = os.path.splitext(inputFilePath)[0] + EXTENSIONS[args.format]
+
+    if outputFilePath == inputFilePath:
+        print("Error: " + args.fileName + " is already in the " + args.format + " format")
+        return
+
+    convertInputFile(inputFilePath, outputFilePath, args.format, args.block_size)
+
+
+# Parse command line arguments:
+#   python3 ConvertInput.py <graph folder name> <input file name> --format bits|sparse|events [--block-size BLOCK_SIZE]
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Convert an input file to another input file format')
+    parser.add_argument('graphPath', help='graph folder name, e.g. GRAPH_SW_N20_E80_P0.15_K8_T100')
+    parser.add_argument('fileName', help='input file name under <graph folder>/Data')
+    parser.add_argument('--format', choices=list(EXTENSIONS), required=True, help='format to convert to')
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE,
+                        help='number of time steps read per pass over a CSV input file (default: %(default)s)')
+    return parser.parse_args()
+
+
+# Convert an input file, one time step at a time.
+#
+# @param inputFilePath input file, as CSV or any binary format
+# @param outputFilePath file to create
+# @param fileFormat format of the file to create, a key of InputFormats.EXTENSIONS
+# @param blockSize number of time steps read per pass over a CSV input file
+def convertInputFile(inputFilePath, outputFilePath, fileFormat, blockSize=BLOCK_SIZE):
+    numOfNodes, numOfSteps, steps = readActiveNodes(inputFilePath, blockSize)
+
+    with createWriter(outputFilePath, fileFormat, numOfNodes, numOfSteps) as writer:
+        for activeNodes in steps:
+            writer.writeStep(activeNodes)
+
+
+# Read the active nodes of every time step of an input file, one time step at a time.
+#
+# A CSV file is read with FindActivePaths.readInputFile, every time step (column) of it, in blocks of blockSize.
+#
+# @param inputFilePath input file, as CSV or any binary format
+# @param blockSize number of time steps read per pass over a CSV file
+# @return (N, TS, iterable of the int arrays of active nodes of each time step)
+def readActiveNodes(inputFilePath, blockSize=BLOCK_SIZE):
+    binaryInput = openInputFile(inputFilePath)
+
+    if binaryInput is not None:
+        steps = (binaryInput.activeNodes(t) for t in range(binaryInput.numOfSteps))
+        return binaryInput.numOfNodes, binaryInput.numOfSteps, steps
+
+    # One row per node, one column per time step
+    numOfSteps = countColumns(inputFilePath)
+    steps = (activeNodes for t, activeNodes in readInputFile(inputFilePath, blockSize, numOfSteps))
+
+    return countRows(inputFilePath), numOfSteps, steps
+
+
+# Count the columns of a CSV file from its first line.
+#
+# @param inputFilePath CSV file
+# @return number of tab separated values on the first line
+def countColumns(inputFilePath):
+    with open(inputFilePath, 'rb') as file:
+        return file.readline().rstrip(b'\r\n').count(b'\t') + 1
+
+
+# Count the rows of a CSV file without parsing them.
+#
+# @param inputFilePath CSV file
+# @return number of lines, the last one counted whether or not it ends with a newline
+def countRows(inputFilePath):
+    numOfRows = 0
+    lastByte = b'\n'
+
+    with open(inputFilePath, 'rb') as file:
+        for buffer in iter(lambda: file.read(COUNT_BUFFER_SIZE), b''):
+            numOfRows = numOfRows + buffer.count(b'\n')
+            lastByte = buffer[-1:]
+
+    return numOfRows + (lastByte != b'\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -5,17 +5,31 @@ Generate an input matrix with a pre-defined density of active nodes across the w
 For example, density = 0.05 creates a matrix with 5% of matrix entries are 1's while the rest are 0's. The 1's are
 randomly distributed across the matrix.
 
+How the 1's are placed:
 
+    Every set of round(density * N * TS) entries is equally likely to be chosen. Instead of drawing one (row, col)
+    entry at a time, the 1's are drawn one time step (column) at a time:
+        1) Draw how many 1's each column gets. For a uniformly random set of entries these counts follow a
+           multivariate hypergeometric distribution.
+        2) For each column, choose that many distinct rows (nodes) uniformly at random.
+
+    Columns are produced one after the other by generateActiveNodes, so they can be written out without ever building
+    the full N x TS matrix. The binary formats (--format bits, sparse or events, see InputFormats.py) are written this
+    way.
+
+Usage:
+    python3 DensityGenerator.py <graph folder name> [--seed SEED] [--format csv|bits|sparse|events] [-v] [--trace FILE]
 """
 
+import argparse
 import datetime
-import sys
+import logging
 
-import networkx as nx
 import numpy as np
 
-# Get graph path from input
-graphPath = str(sys.argv[1])
+from CSRGraph import readGraphHeader
+from GeneratorLog import addLogArguments, configureLog, logEvent
+from InputFormats import EXTENSIONS, createWriter
 
 # percentage of active nodes across the matrix
 density = 0.05
@@ -26,61 +40,140 @@ TS = 1000
 # Unique file name prefix
 tStamp = datetime.datetime.now().strftime('%m-%d--%H-%M-%S').format()
 
+# numpy draws multivariate hypergeometric samples exactly only for populations smaller than this
+MAX_HYPERGEOMETRIC_POPULATION = 10 ** 9
+
 
 def main():
 
+    args = parseArguments()
+    configureLog(args)
+
+    # Random number generator. Runs with the same seed generate the same input file.
+    rng = np.random.default_rng(args.seed)
+
     # Get number of nodes
-    numOfNodes = getNumberOfNodes()
+    numOfNodes = getNumberOfNodes(args.graphPath)
+    logEvent('start', logging.INFO, graph=args.graphPath, N=numOfNodes, TS=TS, density=density)
 
-    # Generate input matrix with specified number of nodes, number of time stamps, and percentage of active nodes
-    inputMatrix = generateInputMatrix(numOfNodes)
+    if args.format in EXTENSIONS:
+        # Write the time steps to a binary file as they are generated
+        generateBinaryFile(args.graphPath, numOfNodes, rng, args.format)
+    else:
+        # Generate input matrix with specified number of nodes, number of time stamps, and percentage of active nodes
+        inputMatrix = generateInputMatrix(numOfNodes, rng)
 
-    # Generate CSV file containing the input matrix
-    generateInputFile(inputMatrix)
+        # Generate CSV file containing the input matrix
+        generateInputFile(args.graphPath, inputMatrix)
 
 
-def getNumberOfNodes():
-    # Load graph into memory
-    graphFile = open(graphPath + "/Graph.txt", 'rb')
+# Parse command line arguments:
+#   python3 DensityGenerator.py <graph folder name> [--seed SEED] [--format csv|bits|sparse|events] [-v] [--trace FILE]
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Generate an input file with a fixed density of active nodes')
+    parser.add_argument('graphPath', help='graph folder name, e.g. GRAPH_SW_N20_E80_P0.15_K8_T100')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the random number generator')
+    parser.add_argument('--format', choices=['csv'] + list(EXTENSIONS), default='csv',
+                        help='input file format: tab separated matrix, bit-packed matrix, sparse active lists or '
+                             'event stream (default: csv)')
+    addLogArguments(parser)
+    return parser.parse_args()
 
-    # Read graph from file
-    G = nx.read_adjlist(graphFile)
 
-    # Assign number of nodes dynamically
-    numOfNodes = G.number_of_nodes()
+def getNumberOfNodes(graphPath):
+    # Read graph metadata, the graph itself is not needed
+    header = readGraphHeader(graphPath)
 
-    return numOfNodes
+    # Assign number of nodes dynamically. Row i of the input matrix is node id i, whatever the node labels of the graph
+    # file are (see NodeIds.py).
+    numOfNodes = header['N']
 
+    return numOfNodes
 
-def generateInputMatrix(numOfNodes):
 
-    # Create a zeros matrix
-    matrix = np.zeros((numOfNodes, TS), dtype=np.int64)
+# Generate the active nodes of each time step, one time step at a time.
+#
+# @param numOfNodes number of nodes N
+# @param rng numpy random Generator
+# @return generator of (t, sorted int array of the nodes active at t) for t = 0 .. TS - 1
+def generateActiveNodes(numOfNodes, rng):
 
     # calculate the number of active nodes by calculating: density * number of entries.
     count_target = int(round(numOfNodes * TS * density))
 
-    # Keep track of the number of 1's entered so far
-    count = 0
-    while count < count_target:
-        # Choose a random row
-        row_random = np.random.randint(0, numOfNodes)
+    # Number of active nodes at each time step
+    counts = getActiveNodesCounts(numOfNodes, count_target, rng)
+
+    for t in range(TS):
+        # Choose counts[t] distinct nodes uniformly at random
+        activeNodes = rng.choice(numOfNodes, size=counts[t], replace=False)
+        activeNodes.sort()
+
+        logEvent('step', t=t, activeNodes=counts[t])
+        yield t, activeNodes
+
+
+# Split count_target 1's among TS columns of numOfNodes entries each, as if the 1's were placed uniformly at random.
+#
+# @return int array of length TS, the number of 1's in each column
+def getActiveNodesCounts(numOfNodes, count_target, rng):
+    columns = np.full(TS, numOfNodes, dtype=np.int64)
+
+    if numOfNodes * TS < MAX_HYPERGEOMETRIC_POPULATION:
+        return rng.multivariate_hypergeometric(columns, count_target)
+
+    # Matrix too large for numpy's hypergeometric: draw each column's share of the remaining 1's with a binomial. This
+    # matches the hypergeometric mean, and its variance up to the finite population factor (1 - density).
+    counts = np.zeros(TS, dtype=np.int64)
+    remaining = count_target
 
-        # Choose a random column
-        col_random = np.random.randint(0, TS)
+    for t in range(TS):
+        columnsLeft = TS - t
 
-        # If entry at [row_random][col_random] is inactive, make it active
-        if matrix[row_random][col_random] == 0:
-            matrix[row_random][col_random] = 1
-            count = count + 1
+        count = rng.binomial(remaining, 1 / columnsLeft)
+
+        # A column holds at most numOfNodes 1's, and the columns after it must be able to hold the rest
+        count = min(count, numOfNodes, remaining)
+        count = max(count, remaining - numOfNodes * (columnsLeft - 1))
+
+        counts[t] = count
+        remaining = remaining - count
+
+    return counts
+
+
+# Generate the full input matrix: one row per node, one column per time step.
+#
+# @return numOfNodes x TS matrix of 0's and 1's
+def generateInputMatrix(numOfNodes, rng):
+
+    # Create a zeros matrix. One byte per entry is enough for 0's and 1's.
+    matrix = np.zeros((numOfNodes, TS), dtype=np.int8)
+
+    for t, activeNodes in generateActiveNodes(numOfNodes, rng):
+        matrix[activeNodes, t] = 1
 
     return matrix
 
 
-def generateInputFile(matrix):
+def generateInputFile(graphPath, matrix):
     CSV = '.csv'
     inputFileName = graphPath + '/Data/' + nameFile('input') + CSV
     np.savetxt(inputFileName, matrix, delimiter='\t', fmt='%d')
+    logEvent('inputFile', logging.INFO, path=inputFileName)
+
+
+# Generate a binary input file one time step at a time, without building the input matrix
+#
+# @param fileFormat format name, a key of InputFormats.EXTENSIONS
+def generateBinaryFile(graphPath, numOfNodes, rng, fileFormat):
+    inputFileName = graphPath + '/Data/' + nameFile('input') + EXTENSIONS[fileFormat]
+
+    with createWriter(inputFileName, fileFormat, numOfNodes, TS) as writer:
+        for t, activeNodes in generateActiveNodes(numOfNodes, rng):
+            writer.writeStep(activeNodes)
+
+    logEvent('inputFile', logging.INFO, path=inputFileName)
 
 
 # File naming convention, to avoid duplicate names
@@ -88,4 +181,6 @@ def nameFile(fname):
     # This creates a timestamped filename so we don't overwrite our good work
     return tStamp + '-' + 'DENSITY' + str(density) + '_TS' + str(TS) + '_' + fname
 
-main()
\ No newline at end of file
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,432 @@
+"""
+DynamicConnectivity.py
+
+Fully dynamic connectivity (Holm, de Lichtenberg and Thorup) for undirected graphs whose vertices and edges are added
+and removed over time. Used to keep the active components up to date when nodes become active or inactive.
+
+How it works:
+
+    Every edge has a level, starting at 0. F_i is a spanning forest of the edges of level >= i, so
+    F_0 is a spanning forest of the whole graph and F_0 ⊇ F_1 ⊇ F_2 ...
+    Edges that are not in F_0 are non-tree edges. Two vertices are connected iff they are in the same tree of F_0.
+
+    Insert edge (u, v):
+        If u and v are not connected, (u, v) becomes a tree edge of level 0. Otherwise it is a non-tree edge of level 0.
+
+    Delete edge (u, v):
+        A non-tree edge is simply dropped.
+        A tree edge of level l is cut from F_0 .. F_l. Then, for i = l down to 0, look for a replacement edge:
+            Let T_u be the smaller of the two trees of F_i that the cut produced.
+            1) Move every tree edge of level i in T_u to level i + 1 (T_u is at most half the size of the tree of F_i
+               it came from, which keeps trees of F_i at most n / 2^i vertices).
+            2) Go through the non-tree edges of level i that touch T_u. An edge leading out of T_u reconnects the two
+               trees: it becomes a tree edge of level i and the search stops. An edge with both ends in T_u is moved
+               to level i + 1.
+        Levels only go up, and never above log2(n), which bounds the amortized cost of a deletion to O(log^2 n).
+
+    Each forest F_i is stored as Euler tours kept in treaps (randomized balanced binary trees), which support linking,
+    cutting and connectivity queries in O(log n) expected time. The treap nodes also count, per subtree, the vertices
+    that have tree edges or non-tree edges of level i, so those vertices can be found in O(log n) each.
+
+Vertices can be any hashable value.
+"""
+import random
+
+
+# One element of an Euler tour: either a vertex (edge is None) or the arc of a tree edge going from edge[0] to edge[1]
+class _TourNode:
+    __slots__ = ('left', 'right', 'parent', 'priority', 'size', 'vertexCount', 'treeEdgeCount', 'nonTreeEdgeCount',
+                 'vertex', 'edge', 'hasTreeEdges', 'hasNonTreeEdges')
+
+    def __init__(self, vertex=None, edge=None):
+        self.left = None
+        self.right = None
+        self.parent = None
+        self.priority = random.random()
+
+        self.vertex = vertex
+        self.edge = edge
+
+        # True if this vertex has tree edges (non-tree edges) of this forest's level
+        self.hasTreeEdges = False
+        self.hasNonTreeEdges = False
+
+        # Subtree aggregates: number of tour nodes, vertices, and vertices flagged with tree and non-tree edges
+        self.size = 1
+        self.vertexCount = 1 if edge is None else 0
+        self.treeEdgeCount = 0
+        self.nonTreeEdgeCount = 0
+
+
+# Recompute the subtree aggregates of a treap node from its children
+def _update(node):
+    size = 1
+    vertexCount = 1 if node.edge is None else 0
+    treeEdgeCount = 1 if node.hasTreeEdges else 0
+    nonTreeEdgeCount = 1 if node.hasNonTreeEdges else 0
+
+    for child in (node.left, node.right):
+        if child is not None:
+            size += child.size
+            vertexCount += child.vertexCount
+            treeEdgeCount += child.treeEdgeCount
+            nonTreeEdgeCount += child.nonTreeEdgeCount
+
+    node.size = size
+    node.vertexCount = vertexCount
+    node.treeEdgeCount = treeEdgeCount
+    node.nonTreeEdgeCount = nonTreeEdgeCount
+
+
+# Concatenate two tours given their treap roots
+#
+# @return root of the concatenated tour
+def _merge(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+
+    if a.priority > b.priority:
+        a.right = _merge(a.right, b)
+        a.right.parent = a
+        _update(a)
+        return a
+    else:
+        b.left = _merge(a, b.left)
+        b.left.parent = b
+        _update(b)
+        return b
+
+
+# Split a tour given its treap root into its first k nodes and the rest
+#
+# @return roots of the two parts (either may be None)
+def _split(node, k):
+    if node is None:
+        return None, None
+
+    leftSize = node.left.size if node.left is not None else 0
+
+    if k <= leftSize:
+        left, right = _split(node.left, k)
+        node.left = right
+        if right is not None:
+            right.parent = node
+        _update(node)
+        if left is not None:
+            left.parent = None
+        node.parent = None
+        return left, node
+    else:
+        left, right = _split(node.right, k - leftSize - 1)
+        node.right = left
+        if left is not None:
+            left.parent = node
+        _update(node)
+        if right is not None:
+            right.parent = None
+        node.parent = None
+        return node, right
+
+
+# @return the treap root of the tour containing node
+def _root(node):
+    while node.parent is not None:
+        node = node.parent
+    return node
+
+
+# @return the position of node in its tour
+def _index(node):
+    index = node.left.size if node.left is not None else 0
+
+    while node.parent is not None:
+        if node is node.parent.right:
+            index += 1 + (node.parent.left.size if node.parent.left is not None else 0)
+        node = node.parent
+
+    return index
+
+
+# Spanning forest F_i of one level, stored as one Euler tour per tree
+class _EulerTourForest:
+
+    def __init__(self):
+        # vertex -> its tour node. Created on demand: a vertex without a tour node is a singleton tree.
+        self.vertexNodes = {}
+
+        # (u, v) -> tour node of the arc from u to v. Every tree edge has both arcs.
+        self.arcNodes = {}
+
+    def vertexNode(self, vertex):
+        node = self.vertexNodes.get(vertex)
+        if node is None:
+            node = _TourNode(vertex=vertex)
+            self.vertexNodes[vertex] = node
+        return node
+
+    # Forget a vertex that has no edges left at this level
+    def removeVertex(self, vertex):
+        self.vertexNodes.pop(vertex, None)
+
+    def connected(self, u, v):
+        return u == v or _root(self.vertexNode(u)) is _root(self.vertexNode(v))
+
+    # @return number of vertices in the tree containing vertex
+    def treeSize(self, vertex):
+        return _root(self.vertexNode(vertex)).vertexCount
+
+    # Rotate the tour containing vertex so that it starts at vertex
+    #
+    # @return treap root of the rotated tour
+    def reroot(self, vertex):
+        node = self.vertexNode(vertex)
+        before, after = _split(_root(node), _index(node))
+        return _merge(after, before)
+
+    # Join the trees of u and v with tree edge (u, v). u and v must not be connected.
+    def link(self, u, v):
+        tourU = self.reroot(u)
+        tourV = self.reroot(v)
+
+        arcUV = _TourNode(edge=(u, v))
+        arcVU = _TourNode(edge=(v, u))
+        self.arcNodes[(u, v)] = arcUV
+        self.arcNodes[(v, u)] = arcVU
+
+        # Tour of u, walk to v, tour of v, walk back to u
+        _merge(_merge(_merge(tourU, arcUV), tourV), arcVU)
+
+    # Remove tree edge (u, v), splitting its tree in two
+    def cut(self, u, v):
+        firstArc = self.arcNodes.pop((u, v))
+        secondArc = self.arcNodes.pop((v, u))
+
+        root = _root(firstArc)
+        firstIndex = _index(firstArc)
+        secondIndex = _index(secondArc)
+
+        if firstIndex > secondIndex:
+            firstIndex, secondIndex = secondIndex, firstIndex
+
+        # tour = before, arc, between, arc, after. 'between' is one tree, 'after' + 'before' is the other.
+        before, rest = _split(root, firstIndex)
+        _, rest = _split(rest, 1)
+        between, rest = _split(rest, secondIndex - firstIndex - 1)
+        _, after = _split(rest, 1)
+
+        _merge(after, before)
+
+    # Mark whether vertex has tree edges (treeEdges=True) or non-tree edges (treeEdges=False) of this level
+    def setFlag(self, vertex, treeEdges, value):
+        node = self.vertexNode(vertex)
+
+        if treeEdges:
+            node.hasTreeEdges = value
+        else:
+            node.hasNonTreeEdges = value
+
+        while node is not None:
+            _update(node)
+            node = node.parent
+
+    # @return list of the vertices in the tree containing vertex that have tree edges (treeEdges=True) or non-tree
+    #         edges (treeEdges=False) of this level
+    def flaggedVertices(self, vertex, treeEdges):
+        flagged = []
+        stack = [_root(self.vertexNode(vertex))]
+
+        while len(stack) > 0:
+            node = stack.pop()
+
+            count = node.treeEdgeCount if treeEdges else node.nonTreeEdgeCount
+            if count == 0:
+                continue
+
+            if node.hasTreeEdges if treeEdges else node.hasNonTreeEdges:
+                flagged.append(node.vertex)
+
+            if node.left is not None:
+                stack.append(node.left)
+            if node.right is not None:
+                stack.append(node.right)
+
+        return flagged
+
+    # @return list of the vertices in the tree containing vertex
+    def treeVertices(self, vertex):
+        vertices = []
+        stack = [_root(self.vertexNode(vertex))]
+
+        while len(stack) > 0:
+            node = stack.pop()
+            if node.edge is None:
+                vertices.append(node.vertex)
+            if node.left is not None:
+                stack.append(node.left)
+            if node.right is not None:
+                stack.append(node.right)
+
+        return vertices
+
+
+class DynamicConnectivity:
+
+    def __init__(self):
+        # Vertices currently in the graph
+        self.vertices = set()
+
+        # forests[i] is F_i, the spanning forest of the tree edges of level >= i
+        self.forests = [_EulerTourForest()]
+
+        # treeEdges[i][u] (nonTreeEdges[i][u]) is the set of vertices v such that (u, v) is a tree edge (non-tree edge)
+        # of level exactly i. Vertices without such edges have no entry.
+        self.treeEdges = [{}]
+        self.nonTreeEdges = [{}]
+
+        # frozenset({u, v}) -> level of the edge (u, v)
+        self.edgeLevel = {}
+
+        # frozenset({u, v}) of the edges that are in F_0
+        self.spanningEdges = set()
+
+    def addVertex(self, vertex):
+        if vertex not in self.vertices:
+            self.vertices.add(vertex)
+            self.forests[0].vertexNode(vertex)
+
+    # Remove vertex and all of its edges
+    def removeVertex(self, vertex):
+        # Collect the neighbours first: deleting an edge can move the other edges of vertex to higher levels
+        neighbours = set()
+        for level in range(len(self.forests)):
+            neighbours.update(self.treeEdges[level].get(vertex, ()))
+            neighbours.update(self.nonTreeEdges[level].get(vertex, ()))
+
+        for neighbour in neighbours:
+            self.deleteEdge(vertex, neighbour)
+
+        for forest in self.forests:
+            forest.removeVertex(vertex)
+
+        self.vertices.discard(vertex)
+
+    def connected(self, u, v):
+        return self.forests[0].connected(u, v)
+
+    def insertEdge(self, u, v):
+        edge = frozenset((u, v))
+        if u == v or edge in self.edgeLevel:
+            return
+
+        self.edgeLevel[edge] = 0
+
+        if self.forests[0].connected(u, v):
+            self._addEdge(self.nonTreeEdges, 0, u, v)
+        else:
+            self.spanningEdges.add(edge)
+            self._addEdge(self.treeEdges, 0, u, v)
+            self.forests[0].link(u, v)
+
+    def deleteEdge(self, u, v):
+        edge = frozenset((u, v))
+        if edge not in self.edgeLevel:
+            return
+
+        level = self.edgeLevel.pop(edge)
+
+        if edge not in self.spanningEdges:
+            self._removeEdge(self.nonTreeEdges, level, u, v)
+            return
+
+        self.spanningEdges.remove(edge)
+        self._removeEdge(self.treeEdges, level, u, v)
+
+        for i in range(level + 1):
+            self.forests[i].cut(u, v)
+
+        for i in range(level, -1, -1):
+            if self._replace(u, v, i):
+                return
+
+    # @return list of the connected components, each a set of vertices
+    def components(self):
+        forest = self.forests[0]
+        seen = set()
+        components = []
+
+        for vertex in self.vertices:
+            if vertex not in seen:
+                component = set(forest.treeVertices(vertex))
+                seen.update(component)
+                components.append(component)
+
+        return components
+
+    # Look for a non-tree edge of level i reconnecting the trees of u and v in F_i, after tree edge (u, v) was cut.
+    #
+    # @return True if a replacement edge was found and added to the spanning forests
+    def _replace(self, u, v, i):
+        forest = self.forests[i]
+
+        # Search from the smaller tree
+        if forest.treeSize(u) > forest.treeSize(v):
+            u, v = v, u
+
+        if i + 1 == len(self.forests):
+            self.forests.append(_EulerTourForest())
+            self.treeEdges.append({})
+            self.nonTreeEdges.append({})
+
+        # 1) Push the tree edges of level i in the smaller tree up to level i + 1
+        for x in forest.flaggedVertices(u, treeEdges=True):
+            for y in list(self.treeEdges[i].get(x, ())):
+                self._removeEdge(self.treeEdges, i, x, y)
+                self._addEdge(self.treeEdges, i + 1, x, y)
+                self.edgeLevel[frozenset((x, y))] = i + 1
+                self.forests[i + 1].link(x, y)
+
+        # 2) Look for a non-tree edge of level i leaving the smaller tree
+        for x in forest.flaggedVertices(u, treeEdges=False):
+            for y in list(self.nonTreeEdges[i].get(x, ())):
+                self._removeEdge(self.nonTreeEdges, i, x, y)
+
+                if forest.connected(u, y):
+                    # Both ends are in the smaller tree: push the edge up to level i + 1
+                    self._addEdge(self.nonTreeEdges, i + 1, x, y)
+                    self.edgeLevel[frozenset((x, y))] = i + 1
+                else:
+                    # Replacement edge found: it becomes a tree edge of level i
+                    edge = frozenset((x, y))
+                    self.edgeLevel[edge] = i
+                    self.spanningEdges.add(edge)
+                    self._addEdge(self.treeEdges, i, x, y)
+                    for j in range(i + 1):
+                        self.forests[j].link(x, y)
+                    return True
+
+        return False
+
+    # Record edge (u, v) in the adjacency sets of the given level, flagging its endpoints in F_level
+    def _addEdge(self, adjacency, level, u, v):
+        treeEdges = adjacency is self.treeEdges
+
+        for a, b in ((u, v), (v, u)):
+            neighbours = adjacency[level].get(a)
+            if neighbours is None:
+                adjacency[level][a] = {b}
+                self.forests[level].setFlag(a, treeEdges, True)
+            else:
+                neighbours.add(b)
+
+    # Remove edge (u, v) from the adjacency sets of the given level, clearing the flag of endpoints left without edges
+    def _removeEdge(self, adjacency, level, u, v):
+        treeEdges = adjacency is self.treeEdges
+
+        for a, b in ((u, v), (v, u)):
+            neighbours = adjacency[level][a]
+            neighbours.discard(b)
+            if len(neighbours) == 0:
+                del adjacency[level][a]
+                self.forests[level].setFlag(a, treeEdges, False)
@@ -1,12 +1,13 @@
 """
 FindActivePaths.py
 
-Given a graph and an input CSV file, find all active connected components for each time step (naively)
+Given a graph and an input file (CSV, or a binary format from InputFormats.py), find all active connected components
+for each time step, independently of the other time steps
 
-How the algorithm works:
+How the algorithm works (bfs engine):
 
 For each time stamp:
-    Pick a node uniformly at random from the list of active nodes.
+    Pick any unvisited node from the list of active nodes.
 
     Run BFS starting on the first node to explore the active component that node belongs to
         Starting at a node, explore all of its active neighbours. Then explore all of the active neighbours' neighbours
@@ -16,194 +17,677 @@ For each time stamp:
 
     Write the list of active components in an output file
 
-    **Note**: The current implementation is slow because it assumes a connected graph
-          Time complexity: O(numOfActiveNodes * (U + V)) which is worst case O(N^2).
-          This is slow because multiple BFS run for each active component. To fix this issue, modify the BFS
-          implementation to account for a disconnected graph. this is a TODO.
+    Each BFS only visits the nodes of its own component, so every active node is visited once per time stamp, whether
+    or not the active nodes are connected. Dense time stamps use a vectorized frontier BFS instead, and the other
+    engines (see ENGINES) find the same components in different ways.
 
 """
-import random
+import argparse
+import collections
+import multiprocessing
+import os
 import re
-import sys
 import timeit
 from random import choice
 
-import networkx as nx
+import numpy as np
 import pandas as pd
 
+from CSRGraph import loadGraph
+from InputFormats import openInputFile
+from OutputFormats import EXTENSIONS, openOutputFile
+from UnionFind import DisjointSet
+
 
 # Number of time stamps
 TS = 100
 
-# Extract graph folder name
-graphPath = str(sys.argv[1])
+# Engines that can be used to find the active components of a single time stamp, selectable with --engine.
+#   bfs:       run a BFS from any unvisited active node until every active node is visited
+#   unionfind: union the endpoints of every edge between two active nodes in a disjoint-set forest, in one pass
+#   diropt:    direction-optimizing BFS over flag arrays, switching to bottom-up levels when the frontier is large
+#   labelprop: hook the active endpoints of every edge onto the smaller component id, in vectorized rounds over the
+#              edges
+ENGINES = ['bfs', 'unionfind', 'diropt', 'labelprop']
+
+# Number of time stamps read per pass over a CSV input file. Larger blocks mean fewer passes over the file, at the cost
+# of holding the active nodes of more time stamps in memory at once.
+BLOCK_SIZE = 100
+
+# Number of rows (nodes) of a CSV input file parsed at a time
+CHUNK_SIZE = 100000
+
+# What is written for each time stamp, selectable with --output-mode.
+#   members: the members of every active component
+#   labels:  the id of the component of every active node
+#   summary: the number of components, the size of the largest one, and how many components have each size
+# Labels and summaries are computed from a component id per node, so no engine builds the member sets in those modes.
+OUTPUT_MODES = ['members', 'labels', 'summary']
+
+# Maximum number of time stamps waiting in the process pool (or to be written), per worker. Keeps the input read a block
+# at a time in parallel mode, while giving every worker something to do.
+PENDING_STEPS_PER_WORKER = 4
 
-# Extract input file name
-fileName = str(sys.argv[2])
+# Graph of a worker process of generateActivePathsParallel, memory-mapped once per worker by initWorker
+workerGraph = None
 
-# Time stamp of input file, will be used to name the output file
-tStamp = re.search("([0-9]{2}\-[0-9]{2}\-\-[0-9]{2}\-[0-9]{2}\-[0-9]{2})", fileName)[0]
+# The bfs engine switches to frontierBfsLabels, which keeps flags in NumPy arrays instead of Python sets, when at least
+# this fraction of the nodes is active
+DENSE_BFS_THRESHOLD = 0.1
 
-# Path of the input file
-inputFilePath = graphPath + "/Data/" + fileName
+# Direction switches of the diropt engine (see directionOptimizingLabels). A BFS level goes bottom-up once the frontier
+# has more than 1 / BOTTOM_UP_ALPHA of the edges of the unvisited active nodes, and back top-down once the frontier
+# holds fewer than 1 / TOP_DOWN_BETA of the active nodes.
+BOTTOM_UP_ALPHA = 2
+TOP_DOWN_BETA = 24
+
+# Output file suffix per engine. The BFS name is kept as is so existing scripts keep finding its output.
+OUTPUT_NAMES = {'bfs': 'BFSOutput', 'unionfind': 'UnionFindOutput', 'diropt': 'DirOptBFSOutput',
+                'labelprop': 'LabelPropagationOutput'}
 
-# Create output file. Active components per time stamp will be saved here.
-outputFile = open(graphPath + '/Data/' + tStamp + '-BFSOutput.txt', 'w')
 
 def main():
 
-    # Load graph into memory
-    graphFile = open(graphPath + "/Graph.txt", 'rb')
+    args = parseArguments()
+
+    # Extract graph folder name
+    graphPath = args.graphPath
+
+    # Extract input file name
+    fileName = args.fileName
+
+    # Time stamp of input file, will be used to name the output file
+    tStamp = re.search("([0-9]{2}\-[0-9]{2}\-\-[0-9]{2}\-[0-9]{2}\-[0-9]{2})", fileName)[0]
+
+    # Path of the input file
+    inputFilePath = graphPath + "/Data/" + fileName
+
+    # Load graph as a CSR graph, memory-mapped from its binary cache
+    G = loadGraph(graphPath)
+
+    # Create output file. Active components per time stamp will be saved here. It is deleted if the input file cannot
+    # be read, instead of being left with an empty header.
+    with openOutputFile(graphPath + '/Data/' + tStamp + '-' + OUTPUT_NAMES[args.engine] +
+                        EXTENSIONS[args.output_format], args.output_format, G.nodeIds) as outputFile:
+        # Read the input file one time stamp at a time
+        steps = readInputFile(inputFilePath, args.block_size)
+
+        # Start timer to measure running time
+        start = timeit.default_timer()
+
+        # Main method to generate active paths for each time step
+        if args.workers == 1:
+            generateActivePaths(G, steps, outputFile, args.engine, args.output_mode)
+        else:
+            generateActivePathsParallel(graphPath, steps, outputFile, args.engine, args.output_mode,
+                                        args.workers or os.cpu_count())
+
+        # Stop timer
+        stop = timeit.default_timer()
+
+        # Measure running time
+        runningTime = stop - start
+
+        # Add running time to output file
+        outputFile.writeRunningTime(runningTime)
+
+
+# Parse command line arguments:
+#   python3 FindActivePaths.py <graph folder name> <input file name (.csv, .bits, .active or .events)>
+#                              [--engine bfs|unionfind|diropt|labelprop] [--block-size BLOCK_SIZE]
+#                              [--output-format text|comps]
+#                              [--output-mode members|labels|summary] [--workers WORKERS]
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Find active connected components for each time stamp')
+    parser.add_argument('graphPath', help='graph folder name, e.g. GRAPH_SW_N20_E80_P0.15_K8_T100')
+    parser.add_argument('fileName', help='input file name under <graph folder>/Data')
+    parser.add_argument('--engine', choices=ENGINES, default='bfs',
+                        help='algorithm used to find the active components of each time stamp (default: bfs)')
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE,
+                        help='number of time stamps read per pass over a CSV input file (default: %(default)s)')
+    parser.add_argument('--output-format', choices=list(EXTENSIONS), default='text',
+                        help='output file format: text, or columnar components (.comps) (default: text)')
+    parser.add_argument('--output-mode', choices=OUTPUT_MODES, default='members',
+                        help='what to write for each time stamp: component members, component label of each active '
+                             'node, or summary statistics (default: members)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes time stamps are spread over, 0 for one per CPU (default: 1)')
+    args = parser.parse_args()
+
+    if args.output_mode == 'summary' and args.output_format != 'text':
+        parser.error("--output-mode summary is only available with --output-format text")
+
+    return args
+
+
+# Find list of active components at each time stamp and write them to the output file.
+#
+# @param original G The original graph, as a CSRGraph
+# @param steps iterable of (t, int array of the active nodes at t), e.g. from readInputFile
+# @param outputFile output file writer the active components of each time stamp are written to (see OutputFormats.py)
+# @param engine name of the engine used to find the active components (see ENGINES)
+# @param outputMode what to write for each time stamp (see OUTPUT_MODES)
+def generateActivePaths(originalG, steps, outputFile, engine='bfs', outputMode='members'):
+
+    # For each time stamp t, with its active nodes
+    for t, activeNodes in steps:
+
+        # Active components, and the time it took to find them
+        activeComponents, runningTime = findStep(originalG, activeNodes, engine, outputMode)
+
+        # Save active components info in output file
+        writeStep(outputFile, t, activeNodes, activeComponents, runningTime, outputMode)
+
+
+# Same as generateActivePaths, with the time stamps spread over a pool of worker processes.
+# Time stamps are independent, so each one is sent to the next free worker, and results are written in order as they
+# come back. Each worker memory-maps the CSR graph itself, so the graph is shared through the page cache rather than
+# copied to every worker.
+#
+# @param graphPath graph folder, the workers load the graph from its binary cache
+# @param steps iterable of (t, int array of the active nodes at t), e.g. from readInputFile
+# @param outputFile output file writer the active components of each time stamp are written to (see OutputFormats.py)
+# @param engine name of the engine used to find the active components (see ENGINES)
+# @param outputMode what to write for each time stamp (see OUTPUT_MODES)
+# @param workers number of worker processes
+def generateActivePathsParallel(graphPath, steps, outputFile, engine='bfs', outputMode='members', workers=1):
+
+    # Time stamps sent to the workers and not written yet, oldest first: (t, active nodes, pending result)
+    pendingSteps = collections.deque()
+
+    with multiprocessing.Pool(workers, initializer=initWorker, initargs=(graphPath,)) as pool:
+
+        for t, activeNodes in steps:
+            result = pool.apply_async(findStepInWorker, (activeNodes, engine, outputMode))
+            pendingSteps.append((t, activeNodes, result))
 
-    # Read graph from file
-    G = nx.read_adjlist(graphFile)
+            # Wait for the oldest time stamp before reading more of the input
+            if len(pendingSteps) >= PENDING_STEPS_PER_WORKER * workers:
+                t, activeNodes, result = pendingSteps.popleft()
+                writeStep(outputFile, t, activeNodes, *result.get(), outputMode)
 
-    # Transform input file into a matrix
-    inputMatrix = inputFileToMatrix(inputFilePath)
+        while len(pendingSteps) > 0:
+            t, activeNodes, result = pendingSteps.popleft()
+            writeStep(outputFile, t, activeNodes, *result.get(), outputMode)
+
+
+# Load the graph of a worker process of generateActivePathsParallel.
+def initWorker(graphPath):
+    global workerGraph
+    workerGraph = loadGraph(graphPath)
+
+
+# findStep, in a worker process of generateActivePathsParallel.
+def findStepInWorker(activeNodes, engine, outputMode):
+    return findStep(workerGraph, activeNodes, engine, outputMode)
+
+
+# Find the active components of one time stamp.
+#
+# @param original G The original graph, as a CSRGraph
+# @param activeNodes int array of the active nodes at this time stamp
+# @param engine name of the engine used to find the active components (see ENGINES)
+# @param outputMode what to write for each time stamp (see OUTPUT_MODES)
+# @return (active components, running time in seconds). The active components are a list of sets of int node ids in
+#         members mode, and the int array of the component id of each active node otherwise.
+def findStep(originalG, activeNodes, engine, outputMode):
 
     # Start timer to measure running time
     start = timeit.default_timer()
 
-    # Main method to generate active paths for each time step
-    generateActivePaths(G, inputMatrix)
+    if outputMode == 'members':
+        # List of active components
+        activeComponents = {'bfs': bfsComponents, 'unionfind': unionFindComponents,
+                            'diropt': directionOptimizingComponents,
+                            'labelprop': labelPropagationComponents}[engine](originalG, activeNodes)
+    else:
+        # Component id of each active node
+        activeComponents = {'bfs': bfsLabels, 'unionfind': unionFindLabels,
+                            'diropt': directionOptimizingLabels,
+                            'labelprop': labelPropagationLabels}[engine](originalG, activeNodes)
 
     # Stop timer
     stop = timeit.default_timer()
 
-    # Measure running time
-    runningTime = stop - start
+    return activeComponents, stop - start
 
-    # Add running time to output file
-    outputFile.write("Running time: " + str(runningTime * 1000) + " ms")
 
-    outputFile.close()
+# Write the active components of one time stamp, as returned by findStep, in the output file.
+def writeStep(outputFile, t, activeNodes, activeComponents, runningTime, outputMode):
+    if outputMode == 'members':
+        outputFile.writeStep(t, activeComponents, runningTime)
+    elif outputMode == 'labels':
+        outputFile.writeLabels(t, activeNodes, activeComponents, runningTime)
+    else:
+        outputFile.writeSummary(t, np.bincount(activeComponents), runningTime)
 
 
-# Find list of active components at each time stamp using BFS explorations.
+# Find list of active components at one time stamp using BFS explorations.
 # Using the list of active nodes, visit each active node and run BFS to explore its active component.
 # Each time an active component is discovered, mark the members of the component as visited. Do  not visit them again.
 # Repeat until all of the active nodes have been visited.
 #
-# @param original G The original graph
-# @param inputFile the input file csv
-# @return list of active paths per time stamp
-def generateActivePaths(originalG, inputMatrix):
+# When the time stamp is dense (see DENSE_BFS_THRESHOLD), the frontier BFS is used instead.
+#
+# @param original G The original graph, as a CSRGraph
+# @param activeNodes int array of the active nodes at this time stamp
+# @return list of active components, each a set of int node ids
+def bfsComponents(originalG, activeNodes):
 
-    # For each time stamp t
-    for t in range(TS):
+    if isDense(originalG, activeNodes):
+        return componentsFromLabels(activeNodes, frontierBfsLabels(originalG, activeNodes))
 
-        # Get list of active nodes
-        activeNodesList = getActiveNodesList(inputMatrix, t)
+    # Set of active nodes that have not been visited yet
+    activeNodesList = set(activeNodes.tolist())
 
-        # Start timer to measure running time
-        start = timeit.default_timer()
+    # initialize visited nodes list. NOTE: only active nodes will be added here.
+    visitedNodes = set()
+
+    # List of active components
+    listOfActiveComponents = []
+
+    # For each unvisited active node, run a BFS to find active connected component
+    # Note: this is slow for disconnected graphs because it runs BFS multiple times per time stamp
+    while len(activeNodesList) > 0:
+        # Start from any unvisited active node
+        startNode = next(iter(activeNodesList))
+
+        # Initialize queue and push initial node
+        queue = [startNode]
+
+        # Mark node as visited
+        visitedNodes.add(startNode)
+
+        # BFS to explore active nodes using the original graph
+        while len(queue) > 0:
+            # Find node first in the queue
+            currentNode = queue[0]
+
+            # Find neighbours of current node
+            neighbours = originalG.neighbors(currentNode).tolist()
 
-        # initialize visited nodes list. NOTE: only active nodes will be added here.
+            # Loop through neighbours
+            for neighbour in neighbours:
+
+                # If neighbour is active and unvisited (active nodes that were already visited are left alone):
+                if neighbour in activeNodesList and neighbour not in visitedNodes:
+                    # Add neighbour to queue
+                    queue.append(neighbour)
+
+                    # Mark as visited
+                    visitedNodes.add(neighbour)
+
+            # Once all neighbours have been exhausted, remove that node from the list of active nodes.
+            activeNodesList.remove(currentNode)
+
+            # Pop that node from queue. We will not visit it again.
+            queue.pop(0)
+
+        # Once queue is empty, it means that the visited nodes form an active component.
+        listOfActiveComponents.append(visitedNodes)
+
+        # clear list of visited nodes for next iteration of BFS.
         visitedNodes = set()
 
-        # List of active components
-        listOfActiveComponents = []
+    return listOfActiveComponents
+
 
-        # For each unvisited active node, run a BFS to find active connected component
-        # Note: this is slow for disconnected graphs because it runs BFS multiple times per time stamp
-        while len(activeNodesList) > 0:
-            # Choose node uniformly at random from list of active nodes
-            currentRandomNode = random.sample(activeNodesList, 1)[0]
+# Find list of active components at one time stamp using a disjoint-set forest.
+# Every active node starts as its own set. For each edge whose endpoints are both active, merge the sets of its
+# endpoints. Once all such edges have been seen, each remaining set is an active component.
+#
+# Time complexity: O((numOfActiveNodes + number of edges incident to active nodes) * alpha(N)), i.e. one near-linear
+# pass, instead of one BFS per component.
+#
+# @param original G The original graph, as a CSRGraph
+# @param activeNodes int array of the active nodes at this time stamp
+# @return list of active components, each a set of int node ids
+def unionFindComponents(originalG, activeNodes):
+    return unionFindForest(originalG, activeNodes.tolist()).groups()
 
-            # Initialize queue and push initial node
-            queue = [str(currentRandomNode)]
 
-            # Mark node as visited
-            visitedNodes.add(str(currentRandomNode))
+# Find the component id of each active node at one time stamp using a disjoint-set forest, without building the
+# components themselves.
+#
+# @param original G The original graph, as a CSRGraph
+# @param activeNodes int array of the active nodes at this time stamp
+# @return int array, the component id (0 .. number of components - 1) of each node of activeNodes
+def unionFindLabels(originalG, activeNodes):
+    activeNodesList = activeNodes.tolist()
 
-            # BFS to explore active nodes using the original graph
-            while len(queue) > 0:
-                # Find node first in the queue
-                currentNode = queue[0]
+    forest = unionFindForest(originalG, activeNodesList)
 
-                # Find neighbours of current node
-                neighbours = set(originalG.neighbors(str(currentNode)))
+    # Nodes with the same root are in the same component. Number the roots 0, 1, ...
+    roots = np.array([forest.find(nodeId) for nodeId in activeNodesList], dtype=np.int64)
+    return np.unique(roots, return_inverse=True)[1].reshape(-1)
 
-                # Loop through neighbours
-                for neighbour in neighbours:
 
-                    if str(neighbour) in activeNodesList:
-                        # If neighbour is active and if neighbor is already visited, leave it.
-                        if str(neighbour) in visitedNodes:
-                            print("Node already visited!")
+# Union the endpoints of every edge between two active nodes.
+#
+# @param original G The original graph, as a CSRGraph
+# @param activeNodesList list of the active nodes at this time stamp
+# @return DisjointSet of the active nodes, one set per active component
+def unionFindForest(originalG, activeNodesList):
+    forest = DisjointSet(activeNodesList)
 
-                        # If neighbour is active and unvisited:
-                        else:
-                            # Add neighbour to queue
-                            queue.append(str(neighbour))
+    for nodeId in activeNodesList:
+        for neighbourId in originalG.neighbors(nodeId).tolist():
 
-                            # Mark as visited
-                            visitedNodes.add(str(neighbour))
+            # Each undirected edge is seen from both endpoints. Only union it once, from its smaller endpoint.
+            if neighbourId > nodeId and neighbourId in forest:
+                forest.union(nodeId, neighbourId)
 
-                # Once all neighbours have been exhausted, remove that node from the list of active nodes.
-                activeNodesList.remove(currentNode)
+    return forest
 
-                # Pop that node from queue. We will not visit it again.
-                queue.pop(0)
 
-            # Once queue is empty, it means that the visited nodes form an active component.
-            listOfActiveComponents.append(visitedNodes)
+# Find the component id of each active node at one time stamp with the BFS engine: the frontier BFS for dense time
+# stamps, sparseBfsLabels otherwise.
+#
+# @param original G The original graph, as a CSRGraph
+# @param activeNodes int array of the active nodes at this time stamp
+# @return int array, the component id (0 .. number of components - 1) of each node of activeNodes
+def bfsLabels(originalG, activeNodes):
+    if isDense(originalG, activeNodes):
+        return frontierBfsLabels(originalG, activeNodes)
 
-            # clear list of visited nodes for next iteration of BFS.
-            visitedNodes = set()
+    return sparseBfsLabels(originalG, activeNodes)
 
-        # Stop timer
-        stop = timeit.default_timer()
 
-        # Save active components info in output file
-        outputFile.write("ts_" + str(t) + ":\n")
-        outputFile.write("\tActive Component(s):\n")
+# Find the component id of each active node at one time stamp with one BFS per component, like bfsComponents, but
+# writing the component id of each node as it is visited instead of building a set per component.
+# Components are numbered in the order of their smallest active node, like frontierBfsLabels numbers them.
+#
+# @param original G The original graph, as a CSRGraph
+# @param activeNodes int array of the active nodes at this time stamp
+# @return int array, the component id (0 .. number of components - 1) of each node of activeNodes
+def sparseBfsLabels(originalG, activeNodes):
+    activeNodesList = activeNodes.tolist()
 
-        for component in listOfActiveComponents:
-            outputFile.write("\t\t" + str(component) + "\n")
+    # Active node -> component id, -1 for nodes not visited yet. Keeps the order of activeNodes.
+    componentOf = dict.fromkeys(activeNodesList, -1)
+
+    numOfComponents = 0
+
+    for node in activeNodesList:
+        if componentOf[node] >= 0:
+            continue
+
+        componentOf[node] = numOfComponents
+        queue = collections.deque([node])
+
+        while len(queue) > 0:
+            for neighbour in originalG.neighbors(queue.popleft()).tolist():
+                # Active and not visited yet (inactive nodes have no entry)
+                if componentOf.get(neighbour) == -1:
+                    componentOf[neighbour] = numOfComponents
+                    queue.append(neighbour)
+
+        numOfComponents = numOfComponents + 1
+
+    return np.fromiter(componentOf.values(), dtype=np.int64, count=len(componentOf))
 
-        # Measure running time
-        runningTime = stop - start
 
-        outputFile.write("\tRunning time per time stamp: " + str(runningTime * 1000) + " ms" + "\n")
-        outputFile.write("--------------------------------------------------\n")
+# @return True if at least DENSE_BFS_THRESHOLD of the nodes of the graph are active
+def isDense(originalG, activeNodes):
+    return len(activeNodes) >= DENSE_BFS_THRESHOLD * originalG.number_of_nodes()
 
 
-# Transform input file CSV into a matrix of 1's and 0's indicating active and inactive nodes respectively
+# Find the component id of each active node at one time stamp using BFS over flag arrays.
+# Active nodes and component ids are kept in NumPy arrays indexed by node, and each BFS expands its whole frontier at
+# once: gather the neighbours of every frontier node from the CSR arrays, keep the active ones that have no component
+# yet, and make them the next frontier. The Python work is per BFS level rather than per node and edge, which pays off
+# when a large fraction of the nodes is active and components are big.
 #
-# @param    inputFile a CSV file indicating active and inactive nodes at each time stamp
-# @return   a data frame representing a matrix of 1's and 0's
-def inputFileToMatrix(inputFile):
-    df = pd.read_csv(inputFile, skipinitialspace=False, header=None, sep='\t', lineterminator='\n',
-                     usecols=[x for x in range(TS)])
-    return df
+# @param original G The original graph, as a CSRGraph
+# @param activeNodes int array of the active nodes at this time stamp
+# @return int array, the component id (0 .. number of components - 1) of each node of activeNodes
+def frontierBfsLabels(originalG, activeNodes):
+    numOfNodes = originalG.number_of_nodes()
+
+    active = np.zeros(numOfNodes, dtype=bool)
+    active[activeNodes] = True
+
+    # Component id of each node, -1 for nodes not visited yet (and inactive nodes)
+    componentOf = np.full(numOfNodes, -1, dtype=np.int64)
+
+    numOfComponents = 0
+
+    for node in activeNodes.tolist():
+        if componentOf[node] >= 0:
+            continue
+
+        componentOf[node] = numOfComponents
+        frontier = np.array([node])
+
+        while len(frontier) > 0:
+            neighbours = originalG.neighborsOf(frontier)
+
+            # Active neighbours that have not been visited yet
+            neighbours = neighbours[active[neighbours]]
+            frontier = np.unique(neighbours[componentOf[neighbours] < 0])
+
+            componentOf[frontier] = numOfComponents
 
+        numOfComponents = numOfComponents + 1
 
-# Extract the list of active nodes at time t.
-# Go through each node at column t in the input matrix and append active nodes (with value '1') to a list. return it.
+    return componentOf[activeNodes]
+
+
+# Find list of active components at one time stamp with the direction-optimizing BFS.
+#
+# @param original G The original graph, as a CSRGraph
+# @param activeNodes int array of the active nodes at this time stamp
+# @return list of active components, each a set of int node ids
+def directionOptimizingComponents(originalG, activeNodes):
+    return componentsFromLabels(activeNodes, directionOptimizingLabels(originalG, activeNodes))
+
+
+# Find the component id of each active node at one time stamp using direction-optimizing BFS.
+# Like frontierBfsLabels, but each BFS level is expanded in one of two directions:
+#   top-down:  gather the neighbours of every frontier node, and keep the active unvisited ones
+#   bottom-up: gather the neighbours of every unvisited active node, and keep the nodes with a neighbour in the frontier
+# Top-down touches the edges of the frontier, bottom-up those of the unvisited active nodes. Once a component has
+# grown a large frontier (typically the middle levels of a giant component in a dense time stamp), the unvisited
+# active nodes have fewer edges left than the frontier, and bottom-up also skips sorting the frontier's neighbours
+# to drop duplicates. Small components never leave top-down.
 #
-# @param inputMatrix matrix of 1's and 0's indicating active and inactive nodes for all time stamps
-# @ return a list of active nodes at time t
-def getActiveNodesList(inputMatrix, t):
+# @param original G The original graph, as a CSRGraph
+# @param activeNodes int array of the active nodes at this time stamp
+# @return int array, the component id (0 .. number of components - 1) of each node of activeNodes
+def directionOptimizingLabels(originalG, activeNodes):
+    numOfNodes = originalG.number_of_nodes()
+    degrees = originalG.degrees()
+
+    active = np.zeros(numOfNodes, dtype=bool)
+    active[activeNodes] = True
+
+    # Component id of each node, -1 for nodes not visited yet (and inactive nodes)
+    componentOf = np.full(numOfNodes, -1, dtype=np.int64)
+
+    # Frontier flag of each node, for bottom-up levels
+    inFrontier = np.zeros(numOfNodes, dtype=bool)
+
+    # Number of edges of the active nodes that have not been expanded yet
+    unvisitedEdges = int(degrees[activeNodes].sum())
+
+    numOfComponents = 0
+
+    for node in activeNodes.tolist():
+        if componentOf[node] >= 0:
+            continue
+
+        componentOf[node] = numOfComponents
+        frontier = np.array([node])
+        bottomUp = False
+
+        while len(frontier) > 0:
+            # Number of edges of the frontier, from the degrees so that no neighbours are gathered for a level that
+            # goes bottom-up
+            frontierEdges = int(degrees[frontier].sum())
+            unvisitedEdges = unvisitedEdges - frontierEdges
+
+            if bottomUp and len(frontier) * TOP_DOWN_BETA < len(activeNodes):
+                bottomUp = False
+
+            if not bottomUp and frontierEdges * BOTTOM_UP_ALPHA > unvisitedEdges:
+                bottomUp = True
+
+                # Only unvisited active nodes can join the frontier. Visited ones are dropped as levels go by.
+                unvisited = activeNodes[componentOf[activeNodes] < 0]
+
+            if bottomUp:
+                unvisited = unvisited[componentOf[unvisited] < 0]
+
+                # Number of frontier neighbours of each unvisited active node
+                inFrontier[frontier] = True
+                hits = np.bincount(np.repeat(np.arange(len(unvisited)), degrees[unvisited]),
+                                   weights=inFrontier[originalG.neighborsOf(unvisited)], minlength=len(unvisited))
+                inFrontier[frontier] = False
+
+                frontier = unvisited[hits > 0]
+            else:
+                # Active neighbours that have not been visited yet
+                neighbours = originalG.neighborsOf(frontier)
+                neighbours = neighbours[active[neighbours]]
+                frontier = np.unique(neighbours[componentOf[neighbours] < 0])
+
+            componentOf[frontier] = numOfComponents
+
+        numOfComponents = numOfComponents + 1
+
+    return componentOf[activeNodes]
+
+
+# Find list of active components at one time stamp with label propagation.
+#
+# @param original G The original graph, as a CSRGraph
+# @param activeNodes int array of the active nodes at this time stamp
+# @return list of active components, each a set of int node ids
+def labelPropagationComponents(originalG, activeNodes):
+    return componentsFromLabels(activeNodes, labelPropagationLabels(originalG, activeNodes))
+
+
+# Find the component id of each active node at one time stamp by min-label propagation (Shiloach-Vishkin style hooking
+# and pointer jumping), with NumPy operations over all the active edges at once and no loop over nodes or edges.
+#
+# Every active node is numbered by its position in activeNodes and starts as the root of its own tree, parent[i] = i.
+# The edge arrays of the graph (CSRGraph.edges) are masked down to the edges whose both endpoints are active. Then,
+# until no root changes:
+#   hook: for every active edge, the root of each endpoint takes the smaller of the two roots as its parent
+#   jump: parent = parent[parent] until every node points directly at its root
+# Parents only ever decrease, so the trees stay acyclic, and the ids flow across one more edge of every path per round:
+# the number of rounds is bounded by the diameter of the largest active component, each round costing
+# O(active nodes + active edges) in NumPy.
+#
+# @param original G The original graph, as a CSRGraph
+# @param activeNodes int array of the active nodes at this time stamp
+# @return int array, the component id (0 .. number of components - 1) of each node of activeNodes
+def labelPropagationLabels(originalG, activeNodes):
+    numOfActiveNodes = len(activeNodes)
+
+    # Position of each active node in activeNodes, -1 for inactive nodes
+    positionOf = np.full(originalG.number_of_nodes(), -1, dtype=np.int64)
+    positionOf[activeNodes] = np.arange(numOfActiveNodes)
+
+    sources, targets = originalG.edges()
+    sources = positionOf[sources]
+    targets = positionOf[targets]
+
+    # Edges between two active nodes
+    activeEdges = (sources >= 0) & (targets >= 0)
+    sources = sources[activeEdges]
+    targets = targets[activeEdges]
+
+    parent = np.arange(numOfActiveNodes)
+
+    while True:
+        sourceRoots = parent[sources]
+        targetRoots = parent[targets]
+
+        # Edges whose endpoints are still in different trees
+        crossing = sourceRoots != targetRoots
+        if not crossing.any():
+            break
+
+        sources = sources[crossing]
+        targets = targets[crossing]
+        sourceRoots = sourceRoots[crossing]
+        targetRoots = targetRoots[crossing]
+
+        # Hook the larger root of every crossing edge under the smaller one
+        np.minimum.at(parent, np.maximum(sourceRoots, targetRoots), np.minimum(sourceRoots, targetRoots))
+
+        # Pointer jumping: flatten every tree to a star
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    # Number the roots 0, 1, ...
+    return np.unique(parent, return_inverse=True)[1].reshape(-1)
+
+
+# Group active nodes by component id.
+#
+# @param activeNodes int array of the active nodes
+# @param componentLabels int array, the component id of each node of activeNodes
+# @return list of active components, each a set of int node ids
+def componentsFromLabels(activeNodes, componentLabels):
+    if len(activeNodes) == 0:
+        return []
+
+    order = np.argsort(componentLabels, kind='stable')
+    sortedLabels = componentLabels[order]
+    bounds = np.flatnonzero(sortedLabels[1:] != sortedLabels[:-1]) + 1
+
+    return [set(component.tolist()) for component in np.split(np.asarray(activeNodes)[order], bounds)]
+
+
+# Read the active nodes of each time stamp of an input file, one time stamp at a time.
+#
+# Binary input files (see InputFormats.py) are memory-mapped and read one time stamp at a time already. A CSV file is
+# one row per node, so reading a single time stamp means reading the whole file. Instead, it is read in blocks of
+# blockSize time stamps (columns): each pass parses CHUNK_SIZE rows at a time, keeps only the columns of the block, and
+# adds the active nodes of each chunk to those of its time stamp. Memory therefore stays bounded by one chunk plus the
+# active nodes of one block, whatever N and TS are, and the first time stamp is available after the first pass.
+#
+# @param inputFile input file, as CSV or any binary format
+# @param blockSize number of time stamps read per pass over a CSV file
+# @param numOfSteps number of time stamps to read, at most the number of columns of a CSV file
+# @return generator of (t, int array of the active nodes at t) for t = 0 .. numOfSteps - 1, or up to the last time
+#         stamp of a binary input file with fewer
+def readInputFile(inputFile, blockSize=BLOCK_SIZE, numOfSteps=TS):
+    binaryInput = openInputFile(inputFile)
+
+    if binaryInput is not None:
+        for t in range(min(numOfSteps, binaryInput.numOfSteps)):
+            yield t, binaryInput.activeNodes(t)
+        return
+
+    for blockStart in range(0, numOfSteps, blockSize):
+        columns = list(range(blockStart, min(blockStart + blockSize, numOfSteps)))
+
+        # Active nodes found so far, per column of the block
+        activeNodes = [[] for column in columns]
+
+        # Node number of the first row of the current chunk
+        firstRow = 0
 
-    # Extract column t from matrix. This is a list of 1's and 0's where the list index is the node number.
-    listOfNodes = list(inputMatrix[t])
+        chunks = pd.read_csv(inputFile, skipinitialspace=False, header=None, sep='\t', lineterminator='\n',
+                             usecols=columns, dtype=np.int8, chunksize=CHUNK_SIZE)
 
-    # List of active nodes
-    activeNodesList = set()
+        for chunk in chunks:
+            values = chunk[columns].to_numpy()
 
-    # Go through each node. If node is active, add it to list of active nodes.
-    nodeNumber = 0
-    for x in listOfNodes:
-        # if node is active, append it to list of active nodes
-        if listOfNodes[nodeNumber] == 1:
-            activeNodesList.add(str(nodeNumber))
+            for i in range(len(columns)):
+                activeNodes[i].append(np.flatnonzero(values[:, i]) + firstRow)
 
-        # Increment nodeNumber
-        nodeNumber = nodeNumber + 1
+            firstRow = firstRow + len(values)
 
-    # return the list of active nodes at time 5
-    return activeNodesList
+        for i, t in enumerate(columns):
+            yield t, np.concatenate(activeNodes[i])
 
 
-main()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
\ No newline at end of file
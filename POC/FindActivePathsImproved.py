@@ -1,4 +1,9 @@
 """
+FindActivePathsImproved.py
+
+Given a graph and an input CSV file, find all active connected components for each time step incrementally, using the
+components found at t - 1 instead of starting from scratch at every time step.
+
 Pseudo code for the set intersection algorithm:
 
 Input:
@@ -27,6 +32,448 @@ Start:
             setC = activeNodes_t DIFFERENCE setA
                 Compute the components of newly  active nodes, merge newly generated components if needed
 
-    Is this a correct algorithm?
-    Is it faster than the baseline? and in which cases would it be faster?
-"""
\ No newline at end of file
+How the engine works:
+
+    The components of t - 1 are kept as two maps: node -> component id and component id -> set of nodes.
+
+    setB: every deactivated node is removed from its component. Only the components that lost a node can split, so a
+          BFS restricted to the remaining members of each of those components finds the pieces. All other components
+          are left untouched.
+
+    setC: every newly active node starts as its own component, and is merged with the component of each of its active
+          neighbours (the smaller component is merged into the larger one).
+
+    The work per time step therefore scales with the number of nodes that changed (and the components they touch)
+    rather than with the total number of active nodes.
+
+    Splitting a touched component still re-explores all of its remaining nodes, which is expensive for long-lived
+    components that keep losing a few nodes at their edges. The 'dynamic' backend keeps the active subgraph in a fully
+    dynamic connectivity structure instead (see DynamicConnectivity.py): activating or deactivating a node inserts or
+    deletes its edges to active neighbours, each in O(log^2 N) amortized time.
+
+Event stream input files (.events, see InputFormats.py) give setB and setC directly, so with them the engine never
+looks at the nodes that did not change.
+
+Segments:
+
+    Updating the components of t - 1 makes the engine sequential over time. To use several cores, the time stamps can
+    be split into segments of --segment-size time stamps that run in parallel (--workers). Each segment starts from a
+    snapshot, i.e. all the nodes active at its first time stamp are activated at once (the components are recomputed
+    from scratch), and is incremental after that. Smaller segments mean more parallelism but more recomputation.
+
+Run it the same way as FindActivePaths.py, the output file has the same format:
+    python3 FindActivePathsImproved.py <graph folder name> <input file name.csv> [--backend sets|dynamic]
+"""
+import argparse
+import collections
+import multiprocessing
+import os
+import re
+import timeit
+
+from CSRGraph import loadGraph
+from DynamicConnectivity import DynamicConnectivity
+from FindActivePaths import BLOCK_SIZE, TS, readInputFile
+from InputFormats import EventStream, openInputFile
+from OutputFormats import EXTENSIONS, openOutputFile
+
+# Maximum number of segments waiting in the process pool (or to be written), per worker
+PENDING_SEGMENTS_PER_WORKER = 2
+
+# Graph of a worker process of generateActivePathsSegmented, memory-mapped once per worker by initWorker
+workerGraph = None
+
+
+def main():
+
+    args = parseArguments()
+
+    # Extract graph folder name
+    graphPath = args.graphPath
+
+    # Extract input file name
+    fileName = args.fileName
+
+    # Time stamp of input file, will be used to name the output file
+    tStamp = re.search("([0-9]{2}\-[0-9]{2}\-\-[0-9]{2}\-[0-9]{2}\-[0-9]{2})", fileName)[0]
+
+    # Path of the input file
+    inputFilePath = graphPath + "/Data/" + fileName
+
+    # Load graph as a CSR graph, memory-mapped from its binary cache
+    G = loadGraph(graphPath)
+
+    # Create output file. Active components per time stamp will be saved here. It is deleted if the input file cannot
+    # be read, instead of being left with an empty header.
+    with openOutputFile(graphPath + '/Data/' + tStamp + '-IncrementalOutput' + EXTENSIONS[args.output_format],
+                        args.output_format, G.nodeIds) as outputFile:
+        # Read the changes of the input file one time stamp at a time
+        changes = readChanges(inputFilePath, args.block_size)
+
+        # Start timer to measure running time
+        start = timeit.default_timer()
+
+        # Main method to generate active paths for each time step
+        workers = args.workers or os.cpu_count()
+
+        if workers == 1 and args.segment_size is None:
+            generateActivePaths(G, changes, outputFile, args.backend)
+        else:
+            # By default, one segment per worker
+            segmentSize = args.segment_size or -(-TS // workers)
+
+            generateActivePathsSegmented(graphPath, changes, outputFile, args.backend, segmentSize, workers)
+
+        # Stop timer
+        stop = timeit.default_timer()
+
+        # Measure running time
+        runningTime = stop - start
+
+        # Add running time to output file
+        outputFile.writeRunningTime(runningTime)
+
+
+# Parse command line arguments:
+#   python3 FindActivePathsImproved.py <graph folder name> <input file name.csv> [--backend sets|dynamic]
+#                                      [--block-size BLOCK_SIZE] [--output-format text|comps]
+#                                      [--workers WORKERS] [--segment-size SEGMENT_SIZE]
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Find active connected components for each time stamp incrementally')
+    parser.add_argument('graphPath', help='graph folder name, e.g. GRAPH_SW_N20_E80_P0.15_K8_T100')
+    parser.add_argument('fileName', help='input file name under <graph folder>/Data')
+    parser.add_argument('--backend', choices=BACKENDS, default='sets',
+                        help='structure holding the active components between time stamps (default: sets)')
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE,
+                        help='number of time stamps read per pass over a CSV input file (default: %(default)s)')
+    parser.add_argument('--output-format', choices=list(EXTENSIONS), default='text',
+                        help='output file format: text, or columnar components (.comps) (default: text)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes segments are spread over, 0 for one per CPU (default: 1)')
+    parser.add_argument('--segment-size', type=int, default=None,
+                        help='number of time stamps per segment, each segment starts from a snapshot (default: one '
+                             'segment per worker)')
+    return parser.parse_args()
+
+
+# Find list of active components at each time stamp by updating the components of the previous time stamp, and write
+# them to the output file.
+#
+# @param originalG The original graph, as a CSRGraph
+# @param changes iterable of (t, setB, setC): the nodes that stopped and started being active at t, e.g. from
+#                readChanges
+# @param outputFile output file writer the active components of each time stamp are written to (see OutputFormats.py)
+# @param backend name of the structure holding the active components (see BACKENDS)
+def generateActivePaths(originalG, changes, outputFile, backend='sets'):
+
+    activeComponents = BACKENDS[backend](originalG)
+
+    # For each time stamp t, with the nodes that became inactive and active
+    for t, setB, setC in changes:
+
+        # Start timer to measure running time
+        start = timeit.default_timer()
+
+        # Move the components of t - 1 to t
+        activeComponents.applyChanges(setB, setC)
+
+        # Stop timer
+        stop = timeit.default_timer()
+
+        # Save active components info in output file
+        outputFile.writeStep(t, activeComponents.getComponents(), stop - start)
+
+
+# Same as generateActivePaths, with the time stamps split into segments that are run in a pool of worker processes.
+# Each segment starts from a snapshot of the active nodes at its first time stamp, and is incremental after that.
+# Results are written in order as segments complete. Each worker memory-maps the CSR graph itself.
+#
+# @param graphPath graph folder, the workers load the graph from its binary cache
+# @param changes iterable of (t, setB, setC), e.g. from readChanges
+# @param outputFile output file writer the active components of each time stamp are written to (see OutputFormats.py)
+# @param backend name of the structure holding the active components (see BACKENDS)
+# @param segmentSize number of time stamps per segment
+# @param workers number of worker processes. With 1, segments run one after the other in this process.
+def generateActivePathsSegmented(graphPath, changes, outputFile, backend='sets', segmentSize=TS, workers=1):
+
+    if workers == 1:
+        originalG = loadGraph(graphPath)
+
+        for segment in readSegments(changes, segmentSize):
+            writeSegment(outputFile, runSegment(originalG, segment, backend))
+        return
+
+    # Segments sent to the workers and not written yet, oldest first
+    pendingSegments = collections.deque()
+
+    with multiprocessing.Pool(workers, initializer=initWorker, initargs=(graphPath,)) as pool:
+
+        for segment in readSegments(changes, segmentSize):
+            pendingSegments.append(pool.apply_async(runSegmentInWorker, (segment, backend)))
+
+            # Wait for the oldest segment before reading more of the input
+            if len(pendingSegments) >= PENDING_SEGMENTS_PER_WORKER * workers:
+                writeSegment(outputFile, pendingSegments.popleft().get())
+
+        while len(pendingSegments) > 0:
+            writeSegment(outputFile, pendingSegments.popleft().get())
+
+
+# Group the changes of each time stamp into segments. The first time stamp of a segment is replaced by a snapshot: no
+# node becomes inactive, and every active node becomes active.
+#
+# @param changes iterable of (t, setB, setC), e.g. from readChanges
+# @param segmentSize number of time stamps per segment
+# @return generator of segments, each a list of (t, setB, setC)
+def readSegments(changes, segmentSize):
+    # Nodes active at the current time stamp
+    activeNodesList = set()
+
+    segment = []
+
+    for t, setB, setC in changes:
+        activeNodesList.difference_update(setB)
+        activeNodesList.update(setC)
+
+        if len(segment) == 0:
+            segment.append((t, set(), set(activeNodesList)))
+        else:
+            segment.append((t, setB, setC))
+
+        if len(segment) == segmentSize:
+            yield segment
+            segment = []
+
+    if len(segment) > 0:
+        yield segment
+
+
+# Find the active components of each time stamp of a segment, starting from no active nodes.
+#
+# @param originalG The original graph, as a CSRGraph
+# @param segment list of (t, setB, setC), from readSegments
+# @param backend name of the structure holding the active components (see BACKENDS)
+# @return list of (t, list of active components, running time in seconds)
+def runSegment(originalG, segment, backend):
+    activeComponents = BACKENDS[backend](originalG)
+
+    results = []
+
+    for t, setB, setC in segment:
+        start = timeit.default_timer()
+
+        activeComponents.applyChanges(setB, setC)
+
+        stop = timeit.default_timer()
+
+        # Results are written after the whole segment has run, copy the components before the next time stamp updates
+        # them
+        results.append((t, [set(component) for component in activeComponents.getComponents()], stop - start))
+
+    return results
+
+
+# Load the graph of a worker process of generateActivePathsSegmented.
+def initWorker(graphPath):
+    global workerGraph
+    workerGraph = loadGraph(graphPath)
+
+
+# runSegment, in a worker process of generateActivePathsSegmented.
+def runSegmentInWorker(segment, backend):
+    return runSegment(workerGraph, segment, backend)
+
+
+# Write the results of runSegment in the output file.
+def writeSegment(outputFile, results):
+    for t, listOfActiveComponents, runningTime in results:
+        outputFile.writeStep(t, listOfActiveComponents, runningTime)
+
+
+# Read the nodes that stopped and started being active at each time stamp of an input file, one time stamp at a time.
+# Event stream files store them as is. For other input files they are the difference between the active nodes of t - 1
+# and t (see readInputFile).
+#
+# @param inputFile input file, as CSV or any binary format
+# @param blockSize number of time stamps read per pass over a CSV file
+# @return generator of (t, setB, setC) for t = 0 .. TS - 1, or up to the last time stamp of a binary input file with
+#         fewer
+def readChanges(inputFile, blockSize=BLOCK_SIZE):
+    eventStream = openInputFile(inputFile)
+
+    if isinstance(eventStream, EventStream):
+        for t in range(min(TS, eventStream.numOfSteps)):
+            activated, deactivated = eventStream.events(t)
+            yield t, set(deactivated.tolist()), set(activated.tolist())
+        return
+
+    previousActiveNodes = set()
+
+    for t, activeNodes in readInputFile(inputFile, blockSize):
+        activeNodesList = set(activeNodes.tolist())
+
+        yield t, previousActiveNodes - activeNodesList, activeNodesList - previousActiveNodes
+        previousActiveNodes = activeNodesList
+
+
+# Neighbours of a node of the original graph, as a list of Python ints like the ones in the set of active nodes.
+#
+# @param originalG The original graph, as a CSRGraph
+# @param node int node id
+# @return list of the ids of node's neighbours
+def neighbors(originalG, node):
+    return originalG.neighbors(node).tolist()
+
+
+# Active components of the original graph, maintained incrementally as nodes become active and inactive.
+class ActiveComponents:
+
+    # @param originalG The original graph, as a CSRGraph
+    def __init__(self, originalG):
+        self.originalG = originalG
+
+        # Active node -> id of the component it belongs to
+        self.componentOf = {}
+
+        # Component id -> set of active nodes in that component
+        self.components = {}
+
+        # Next unused component id
+        self.nextComponentId = 0
+
+    # Move to the next time stamp given the nodes that changed.
+    #
+    # @param setB set of active nodes that became inactive
+    # @param setC set of inactive nodes that became active
+    def applyChanges(self, setB, setC):
+        self.deactivate(setB)
+        self.activate(setC)
+
+    # Remove nodes from their components, and split the components that lost a node if needed.
+    #
+    # @param nodes active nodes that became inactive
+    def deactivate(self, nodes):
+        # Components that lost at least one node
+        touchedComponents = set()
+
+        for node in nodes:
+            componentId = self.componentOf.pop(node)
+            self.components[componentId].discard(node)
+            touchedComponents.add(componentId)
+
+        # Only the touched components may have split. Re-explore what remains of each of them.
+        for componentId in touchedComponents:
+            remainingNodes = self.components.pop(componentId)
+            self.splitComponent(remainingNodes)
+
+    # Find the components formed by a set of nodes that used to be one component, using BFS restricted to those nodes.
+    #
+    # @param nodes remaining nodes of a component
+    def splitComponent(self, nodes):
+        unvisitedNodes = set(nodes)
+
+        while len(unvisitedNodes) > 0:
+            startNode = unvisitedNodes.pop()
+            component = {startNode}
+            queue = [startNode]
+
+            while len(queue) > 0:
+                currentNode = queue.pop()
+
+                for neighbour in neighbors(self.originalG, currentNode):
+                    if neighbour in unvisitedNodes:
+                        unvisitedNodes.remove(neighbour)
+                        component.add(neighbour)
+                        queue.append(neighbour)
+
+            self.addComponent(component)
+
+    # Add nodes to the active components, merging them with the components of their active neighbours.
+    #
+    # @param nodes inactive nodes that became active
+    def activate(self, nodes):
+        for node in nodes:
+            componentId = self.addComponent({node})
+
+            for neighbour in neighbors(self.originalG, node):
+                if neighbour in self.componentOf:
+                    componentId = self.mergeComponents(componentId, self.componentOf[neighbour])
+
+    # Store a new component.
+    #
+    # @param nodes set of active nodes forming a component
+    # @return id of the new component
+    def addComponent(self, nodes):
+        componentId = self.nextComponentId
+        self.nextComponentId = self.nextComponentId + 1
+
+        self.components[componentId] = nodes
+        for node in nodes:
+            self.componentOf[node] = componentId
+
+        return componentId
+
+    # Merge two components by moving the nodes of the smaller one into the larger one.
+    #
+    # @return id of the merged component
+    def mergeComponents(self, componentIdA, componentIdB):
+        if componentIdA == componentIdB:
+            return componentIdA
+
+        if len(self.components[componentIdA]) < len(self.components[componentIdB]):
+            componentIdA, componentIdB = componentIdB, componentIdA
+
+        smallerComponent = self.components.pop(componentIdB)
+        self.components[componentIdA].update(smallerComponent)
+        for node in smallerComponent:
+            self.componentOf[node] = componentIdA
+
+        return componentIdA
+
+    # The sets are the ones the structure keeps updating, copy them to keep them past the next time stamp.
+    #
+    # @return list of the current active components, each a set of nodes
+    def getComponents(self):
+        return list(self.components.values())
+
+
+# Active components of the original graph, backed by a fully dynamic connectivity structure over the active subgraph.
+# Same interface as ActiveComponents.
+class DynamicActiveComponents:
+
+    # @param originalG The original graph, as a CSRGraph
+    def __init__(self, originalG):
+        self.originalG = originalG
+
+        # The subgraph of the original graph induced by the active nodes
+        self.connectivity = DynamicConnectivity()
+
+    # Move to the next time stamp given the nodes that changed.
+    #
+    # @param setB set of active nodes that became inactive
+    # @param setC set of inactive nodes that became active
+    def applyChanges(self, setB, setC):
+        # Removing a node deletes its edges to its active neighbours
+        for node in setB:
+            self.connectivity.removeVertex(node)
+
+        for node in setC:
+            self.connectivity.addVertex(node)
+
+            for neighbour in neighbors(self.originalG, node):
+                if neighbour in self.connectivity.vertices:
+                    self.connectivity.insertEdge(node, neighbour)
+
+    # @return list of the current active components, each a set of nodes
+    def getComponents(self):
+        return self.connectivity.components()
+
+
+# Structures that can hold the active components between time stamps, selectable with --backend.
+#   sets:    component maps, components that lose nodes are re-explored with BFS
+#   dynamic: fully dynamic connectivity (Holm, de Lichtenberg and Thorup) over the active subgraph
+BACKENDS = {'sets': ActiveComponents, 'dynamic': DynamicActiveComponents}
+
+
+if __name__ == '__main__':
+    main()
@@ -12,6 +12,8 @@ import os
 import networkx as nx
 import matplotlib.pyplot as plt
 
+from CSRGraph import CSRGraph, writeGraphCache
+
 # Number of nodes in original graph G
 graphN = 10000000
 
@@ -78,6 +80,7 @@ def saveGraph(G):
     # First, store graph adjacency list in Graph.txt
     # Second, Store graph params in GraphDetails.txt
     # Third, Append Graph.txt to GraphDetails.txt
+    # Fourth, store the binary graph cache (GraphOffsets.npy, GraphNeighbours.npy, GraphHeader.json) read by the tools
     if isNewDirectory:
         graphFile = folderName + '/' + 'Graph.txt'
         detailsFile = folderName + '/' + 'GraphDetails.txt'
@@ -104,6 +107,9 @@ def saveGraph(G):
             # for each line in the temp file, append it to main file
             for line in graphLines:
                 detailsLines.write(line)
+
+        # Store graph in binary form, so the other tools can memory-map it instead of parsing Graph.txt
+        writeGraphCache(CSRGraph.fromNetworkx(G), folderName, numOfNeighbours, probabilityP)
     else:
         print("Error: Graph with the same parameters exists")
     return folderName
@@ -0,0 +1,89 @@
+"""
+GeneratorLog.py
+
+Progress and trace output of the input generators (RandomWalksGenerator.py, DensityGenerator.py). By default a
+generator writes nothing but its output files.
+
+How it works:
+
+    Generators report events through logEvent: a name and a few key=value fields, e.g.
+
+        logEvent('step', t=t, activeNodes=len(activeNodes))
+
+    Events go to the standard logging logger 'generators', at two levels:
+        INFO:  one event per stage of a run (walks generated, input file written, ...), shown with -v
+        DEBUG: one event per time step, shown with -vv
+
+    An event is formatted only if some handler will write it. When output is disabled (the default, and whenever a
+    generator is imported rather than run) logEvent costs a call and one cached level check. The fields are still
+    computed before the call, so call sites whose fields are expensive to compute (e.g. the total number of components
+    in RandomWalksGenerator.py) check isEnabled first.
+
+    --trace <file> additionally writes every event, at both levels, to a compact tab-separated trace:
+
+        <ms since start>\t<event>\t<key>=<value>\t<key>=<value>...
+
+    one line per event, so that a run can be followed or compared afterwards without slowing it down with console
+    output.
+"""
+import logging
+
+# Logger of all generators
+log = logging.getLogger('generators')
+
+# Console level for each number of -v flags
+VERBOSITY_LEVELS = [logging.WARNING, logging.INFO, logging.DEBUG]
+
+
+# Add the -v and --trace options to the argument parser of a generator.
+def addLogArguments(parser):
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help='print progress: -v once per stage, -vv once per time step')
+    parser.add_argument('--trace', default=None, metavar='FILE',
+                        help='write every event to FILE, one tab separated line per event')
+
+
+# Set up the console and trace output from the parsed -v and --trace options.
+def configureLog(args):
+    consoleLevel = VERBOSITY_LEVELS[min(args.verbose, len(VERBOSITY_LEVELS) - 1)]
+
+    console = logging.StreamHandler()
+    console.setLevel(consoleLevel)
+    console.setFormatter(logging.Formatter('%(message)s'))
+    log.addHandler(console)
+
+    if args.trace is not None:
+        trace = logging.FileHandler(args.trace, mode='w')
+        trace.setLevel(logging.DEBUG)
+        trace.setFormatter(logging.Formatter('%(relativeCreated)d\t%(message)s'))
+        log.addHandler(trace)
+
+    # Events below every handler's level are dropped before being formatted
+    log.setLevel(logging.DEBUG if args.trace is not None else consoleLevel)
+    log.propagate = False
+
+
+# @return True if events of this level are written anywhere
+def isEnabled(level=logging.DEBUG):
+    return log.isEnabledFor(level)
+
+
+# Report an event.
+#
+# @param name event name
+# @param level logging level, DEBUG for per time step events and INFO for per stage events
+# @param fields values of the event, written as key=value
+def logEvent(name, level=logging.DEBUG, **fields):
+    if log.isEnabledFor(level):
+        log.log(level, Event(name, fields))
+
+
+# Event message, formatted only when a handler writes it
+class Event:
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def __str__(self):
+        return '\t'.join([self.name] + [key + '=' + str(value) for key, value in self.fields.items()])
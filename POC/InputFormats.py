@@ -0,0 +1,354 @@
+"""
+InputFormats.py
+
+Binary input file formats, as alternatives to the tab separated N x TS matrix of 0's and 1's (input.csv).
+
+Bit-packed matrix (.bits):
+
+    The same matrix, stored with 1 bit per entry, one time step (column) after the other:
+
+        header   32 bytes: magic b'APSGBITS', format version (uint32), reserved (uint32), N (uint64), TS (uint64)
+        step 0   ceil(N / 8) bytes: bit i (least significant bit first) is 1 iff node i is active at t = 0
+        step 1   ...
+        ...
+        step TS - 1
+
+    A 10,000,000 x 1000 matrix takes ~1.25 GB instead of ~20 GB of text, and since every time step is contiguous the
+    reader memory-maps the file and reads a time step as a slice.
+
+Sparse active lists (.active):
+
+    Only the active nodes of each time step, as sorted node ids:
+
+        header   32 bytes: magic b'APSGSPRS', format version (uint32), reserved (uint32), N (uint64), TS (uint64)
+        offsets  (TS + 1) uint64: the active nodes of step t are entries offsets[t] .. offsets[t + 1] - 1 of the ids
+        ids      int32 node ids, the active nodes of step 0 (sorted), then those of step 1, ...
+
+    The file size is proportional to the number of 1's in the matrix, which for low densities or random-walk data is a
+    small fraction of N x TS. Reading step t touches only two offsets and its own ids, i.e. O(active) work.
+
+Event stream (.events):
+
+    Only what changed since the previous time step (all nodes are inactive before step 0):
+
+        header   32 bytes: magic b'APSGEVNT', format version (uint32), reserved (uint32), N (uint64), TS (uint64)
+        offsets  (TS + 1) uint64: the events of step t are entries offsets[t] .. offsets[t + 1] - 1 of the events
+        events   int32: a value v >= 0 means node v becomes active (+1), v < 0 means node ~v = -v - 1 becomes
+                 inactive (-1). Activations of a step come before its deactivations.
+
+    File size and reading cost scale with the churn of the stream rather than with N x TS, which is what the
+    incremental engine (FindActivePathsImproved.py) needs. ConvertInput.py converts existing input files.
+
+All integers are little-endian.
+"""
+import os
+import struct
+
+import numpy as np
+
+# File extension of each format
+BIT_PACKED = '.bits'
+SPARSE = '.active'
+EVENTS = '.events'
+
+# Binary formats by the name used on the command line (--format)
+EXTENSIONS = {'bits': BIT_PACKED, 'sparse': SPARSE, 'events': EVENTS}
+
+# Bit-packed header: magic, version, reserved, N, TS
+BIT_PACKED_MAGIC = b'APSGBITS'
+BIT_PACKED_HEADER = struct.Struct('<8sIIQQ')
+BIT_PACKED_VERSION = 1
+
+# Sparse active lists and event stream header: magic, version, reserved, N, TS
+SPARSE_MAGIC = b'APSGSPRS'
+EVENTS_MAGIC = b'APSGEVNT'
+OFFSETS_FILE_HEADER = struct.Struct('<8sIIQQ')
+OFFSETS_FILE_VERSION = 1
+
+
+# Create a writer for a binary input file.
+#
+# @param path path of the file to create
+# @param fileFormat format name, a key of EXTENSIONS
+# @param numOfNodes number of nodes N
+# @param numOfSteps number of time steps TS
+# @return a writer with writeStep(activeNodes), to be used as a context manager
+def createWriter(path, fileFormat, numOfNodes, numOfSteps):
+    writers = {'bits': BitPackedWriter, 'sparse': SparseWriter, 'events': EventWriter}
+    return writers[fileFormat](path, numOfNodes, numOfSteps)
+
+
+# Open a binary input file for reading, based on its extension.
+#
+# @param path path of the input file
+# @return a reader with numOfNodes, numOfSteps and activeNodes(t), or None if path is not a binary input file
+def openInputFile(path):
+    readers = {BIT_PACKED: BitPackedMatrix, SPARSE: SparseActiveLists, EVENTS: EventStream}
+    extension = os.path.splitext(path)[1]
+
+    if extension in readers:
+        return readers[extension](path)
+
+    return None
+
+
+# Write a bit-packed matrix one time step at a time. Use as a context manager:
+#
+#   with BitPackedWriter(path, numOfNodes, numOfSteps) as writer:
+#       for t in range(numOfSteps):
+#           writer.writeStep(activeNodes)
+class BitPackedWriter:
+
+    # @param path path of the file to create
+    # @param numOfNodes number of nodes N
+    # @param numOfSteps number of time steps TS
+    def __init__(self, path, numOfNodes, numOfSteps):
+        self.numOfNodes = numOfNodes
+        self.numOfSteps = numOfSteps
+        self.stepsWritten = 0
+
+        self.file = open(path, 'wb')
+        self.file.write(BIT_PACKED_HEADER.pack(BIT_PACKED_MAGIC, BIT_PACKED_VERSION, 0, numOfNodes, numOfSteps))
+
+    # Write the next time step.
+    #
+    # @param activeNodes int array of the nodes active at this time step
+    def writeStep(self, activeNodes):
+        column = np.zeros(self.numOfNodes, dtype=bool)
+        column[activeNodes] = True
+
+        self.file.write(np.packbits(column, bitorder='little').tobytes())
+        self.stepsWritten = self.stepsWritten + 1
+
+    def close(self):
+        self.file.close()
+
+        if self.stepsWritten != self.numOfSteps:
+            raise ValueError("Expected " + str(self.numOfSteps) + " time steps, " + str(self.stepsWritten) +
+                             " were written")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.close()
+        else:
+            self.file.close()
+
+
+# Read-only, memory-mapped view of a bit-packed matrix
+class BitPackedMatrix:
+
+    # @param path path of a .bits file
+    def __init__(self, path):
+        with open(path, 'rb') as inputFile:
+            magic, version, _, numOfNodes, numOfSteps = BIT_PACKED_HEADER.unpack(
+                inputFile.read(BIT_PACKED_HEADER.size))
+
+        if magic != BIT_PACKED_MAGIC or version != BIT_PACKED_VERSION:
+            raise ValueError(path + " is not a bit-packed input file")
+
+        self.numOfNodes = numOfNodes
+        self.numOfSteps = numOfSteps
+
+        # One row of packed bytes per time step
+        self.steps = np.memmap(path, dtype=np.uint8, mode='r', offset=BIT_PACKED_HEADER.size,
+                               shape=(numOfSteps, (numOfNodes + 7) // 8))
+
+    # @return bool array of length N, True for the nodes active at time step t
+    def column(self, t):
+        return np.unpackbits(self.steps[t], count=self.numOfNodes, bitorder='little').view(bool)
+
+    # @return sorted int array of the nodes active at time step t
+    def activeNodes(self, t):
+        return np.flatnonzero(self.column(t))
+
+
+# Common part of the files made of a header, TS + 1 offsets, and int32 records grouped by time step (.active, .events)
+class _OffsetsWriter:
+
+    # File magic, set by subclasses
+    magic = None
+
+    # @param path path of the file to create
+    # @param numOfNodes number of nodes N
+    # @param numOfSteps number of time steps TS
+    def __init__(self, path, numOfNodes, numOfSteps):
+        self.numOfNodes = numOfNodes
+        self.numOfSteps = numOfSteps
+
+        # offsets[t] is the number of records written before step t
+        self.offsets = [0]
+
+        self.file = open(path, 'wb')
+        self.file.write(OFFSETS_FILE_HEADER.pack(self.magic, OFFSETS_FILE_VERSION, 0, numOfNodes, numOfSteps))
+
+        # Leave room for the offsets, they are filled in by close() once all steps are written
+        self.file.write(bytes(8 * (numOfSteps + 1)))
+
+    # Write the records of the next time step
+    #
+    # @param records int32 array
+    def writeRecords(self, records):
+        self.file.write(records.astype('<i4').tobytes())
+        self.offsets.append(self.offsets[-1] + len(records))
+
+    def close(self):
+        stepsWritten = len(self.offsets) - 1
+
+        if stepsWritten == self.numOfSteps:
+            self.file.seek(OFFSETS_FILE_HEADER.size)
+            self.file.write(np.array(self.offsets, dtype='<u8').tobytes())
+
+        self.file.close()
+
+        if stepsWritten != self.numOfSteps:
+            raise ValueError("Expected " + str(self.numOfSteps) + " time steps, " + str(stepsWritten) +
+                             " were written")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.close()
+        else:
+            self.file.close()
+
+
+# Read-only, memory-mapped view of a file written by an _OffsetsWriter
+class _OffsetsFile:
+
+    # File magic, set by subclasses
+    magic = None
+
+    # @param path path of the file
+    def __init__(self, path):
+        with open(path, 'rb') as inputFile:
+            magic, version, _, numOfNodes, numOfSteps = OFFSETS_FILE_HEADER.unpack(
+                inputFile.read(OFFSETS_FILE_HEADER.size))
+
+        if magic != self.magic or version != OFFSETS_FILE_VERSION:
+            raise ValueError(path + " is not a " + type(self).__name__ + " input file")
+
+        self.numOfNodes = numOfNodes
+        self.numOfSteps = numOfSteps
+
+        self.offsets = np.memmap(path, dtype='<u8', mode='r', offset=OFFSETS_FILE_HEADER.size,
+                                 shape=(numOfSteps + 1,))
+
+        numOfRecords = int(self.offsets[numOfSteps])
+
+        if numOfRecords > 0:
+            self.records = np.memmap(path, dtype='<i4', mode='r',
+                                     offset=OFFSETS_FILE_HEADER.size + 8 * (numOfSteps + 1), shape=(numOfRecords,))
+        else:
+            # np.memmap can't map an empty region
+            self.records = np.zeros(0, dtype='<i4')
+
+    # @return int32 array of the records of time step t
+    def stepRecords(self, t):
+        return self.records[self.offsets[t]:self.offsets[t + 1]]
+
+
+# Write sparse active lists one time step at a time. Use as a context manager, like BitPackedWriter.
+class SparseWriter(_OffsetsWriter):
+
+    magic = SPARSE_MAGIC
+
+    # Write the next time step.
+    #
+    # @param activeNodes int array of the nodes active at this time step
+    def writeStep(self, activeNodes):
+        self.writeRecords(np.unique(np.asarray(activeNodes, dtype=np.int32)))
+
+
+# Read-only, memory-mapped view of sparse active lists
+class SparseActiveLists(_OffsetsFile):
+
+    magic = SPARSE_MAGIC
+
+    # @return sorted int array of the nodes active at time step t
+    def activeNodes(self, t):
+        return self.stepRecords(t)
+
+    # @return bool array of length N, True for the nodes active at time step t
+    def column(self, t):
+        column = np.zeros(self.numOfNodes, dtype=bool)
+        column[self.activeNodes(t)] = True
+        return column
+
+
+# Write an event stream one time step at a time. Use as a context manager, like BitPackedWriter.
+# Steps can be given either as the events themselves (writeEvents) or as the full set of active nodes (writeStep), in
+# which case the events are the difference with the previous step.
+class EventWriter(_OffsetsWriter):
+
+    magic = EVENTS_MAGIC
+
+    def __init__(self, path, numOfNodes, numOfSteps):
+        _OffsetsWriter.__init__(self, path, numOfNodes, numOfSteps)
+
+        # Sorted active nodes of the previous step, used by writeStep
+        self.previousActiveNodes = np.zeros(0, dtype=np.int32)
+
+    # Write the next time step from its active nodes.
+    #
+    # @param activeNodes int array of the nodes active at this time step
+    def writeStep(self, activeNodes):
+        activeNodes = np.unique(np.asarray(activeNodes, dtype=np.int32))
+
+        activated = np.setdiff1d(activeNodes, self.previousActiveNodes, assume_unique=True)
+        deactivated = np.setdiff1d(self.previousActiveNodes, activeNodes, assume_unique=True)
+
+        self.writeEvents(activated, deactivated)
+        self.previousActiveNodes = activeNodes
+
+    # Write the next time step from its events.
+    #
+    # @param activated int array of the nodes that become active at this time step
+    # @param deactivated int array of the nodes that become inactive at this time step
+    def writeEvents(self, activated, deactivated):
+        activated = np.asarray(activated, dtype=np.int32)
+        deactivated = np.asarray(deactivated, dtype=np.int32)
+
+        self.writeRecords(np.concatenate((activated, ~deactivated)))
+
+
+# Read-only, memory-mapped view of an event stream.
+# Active nodes of a time step are rebuilt by replaying the events. Reading the steps in order costs O(events) per step.
+class EventStream(_OffsetsFile):
+
+    magic = EVENTS_MAGIC
+
+    def __init__(self, path):
+        _OffsetsFile.__init__(self, path)
+
+        # Replay state: active flags after applying the events of steps 0 .. replayedSteps - 1
+        self.active = np.zeros(self.numOfNodes, dtype=bool)
+        self.replayedSteps = 0
+
+    # @return (activated, deactivated): int arrays of the nodes that become active and inactive at time step t
+    def events(self, t):
+        records = self.stepRecords(t)
+        return records[records >= 0], ~records[records < 0]
+
+    # @return bool array of length N, True for the nodes active at time step t
+    def column(self, t):
+        # Going back in time: replay from the start
+        if t < self.replayedSteps - 1:
+            self.active[:] = False
+            self.replayedSteps = 0
+
+        while self.replayedSteps <= t:
+            activated, deactivated = self.events(self.replayedSteps)
+            self.active[deactivated] = False
+            self.active[activated] = True
+            self.replayedSteps = self.replayedSteps + 1
+
+        return self.active.copy()
+
+    # @return sorted int array of the nodes active at time step t
+    def activeNodes(self, t):
+        return np.flatnonzero(self.column(t))
@@ -0,0 +1,98 @@
+"""
+NodeIds.py
+
+Interning of node labels: the labels of a graph file are mapped to dense integer ids 0 .. N - 1 once, when the graph
+is loaded, and ids are mapped back to labels only when results are written. Everything in between (the CSR graph,
+input files, the engines) works on the ids.
+
+How it works:
+
+    The distinct labels are sorted, numerically if they are all integers, and the id of a label is its position in that
+    order.
+
+    Graphs written by GenerateGraph.py are labelled '0' .. 'N-1', so every label maps to the id with the same value.
+    Such an identity map stores nothing: converting is int(label) one way and str(id) the other.
+
+    Any other set of labels is kept as an array, labels[id] being the label of id, plus a dict label -> id built the
+    first time a label is looked up. The array is saved in the binary graph cache (see CSRGraph.py).
+"""
+import numpy as np
+
+
+class NodeIds:
+
+    # @param numOfNodes number of nodes N
+    # @param labels array of N strings, labels[id] is the label of node id. None for the identity map.
+    def __init__(self, numOfNodes, labels=None):
+        self.numOfNodes = numOfNodes
+        self.labels = labels
+
+        # Label -> id, built on first lookup. Not needed by the identity map.
+        self.idOf = None
+
+    # @return True if the label of every node is its id
+    def isIdentity(self):
+        return self.labels is None
+
+    # @param label node label
+    # @return int id of label
+    def id(self, label):
+        if self.labels is None:
+            return int(label)
+
+        if self.idOf is None:
+            self.idOf = {nodeLabel: nodeId for nodeId, nodeLabel in enumerate(self.labels.tolist())}
+
+        return self.idOf[str(label)]
+
+    # @param labels iterable of node labels
+    # @return int32 array of the ids of labels
+    def ids(self, labels):
+        if self.labels is None:
+            return np.array([int(label) for label in labels], dtype=np.int32)
+
+        return np.array([self.id(label) for label in labels], dtype=np.int32)
+
+    # @param nodeId int node id
+    # @return label of nodeId, as a string
+    def label(self, nodeId):
+        if self.labels is None:
+            return str(nodeId)
+
+        return str(self.labels[nodeId])
+
+    # @param nodeIds iterable of int node ids
+    # @return list of the labels of nodeIds
+    def labelsOf(self, nodeIds):
+        if self.labels is None:
+            return [str(nodeId) for nodeId in nodeIds]
+
+        return [str(self.labels[nodeId]) for nodeId in nodeIds]
+
+    # Intern an array of node labels, e.g. every label appearing in a graph file (with repetitions).
+    #
+    # @param labels array of node labels, of ints or strings
+    # @return (NodeIds of the distinct labels, int32 array of the id of each entry of labels)
+    @classmethod
+    def intern(cls, labels):
+        labels = np.asarray(labels)
+
+        if labels.dtype.kind not in 'iu':
+            # Sort numerically if every label is an integer
+            try:
+                labels = labels.astype(np.int64)
+            except ValueError:
+                distinctLabels, ids = np.unique(labels, return_inverse=True)
+                return cls(len(distinctLabels), distinctLabels.astype(str)), ids.astype(np.int32)
+
+        if len(labels) == 0:
+            return cls(0), labels.astype(np.int32)
+
+        # Labels 0 .. N - 1, each appearing at least once: the identity map. This is checked without sorting.
+        if labels.min() == 0 and labels.max() < len(labels) and np.bincount(labels).all():
+            return cls(int(labels.max()) + 1), labels.astype(np.int32)
+
+        distinctLabels = np.unique(labels)
+        ids = np.searchsorted(distinctLabels, labels).astype(np.int32)
+
+        return cls(len(distinctLabels), distinctLabels.astype(str)), ids
@@ -0,0 +1,339 @@
+"""
+OutputFormats.py
+
+Output file formats for the active components found at each time step.
+
+Text (.txt):
+
+    The format read by humans and by tests/OutputTest.py:
+
+        ts_<t>:
+            Active Component(s):
+                {'<node>', '<node>', ...}
+            Running time per time stamp: <ms> ms
+        --------------------------------------------------
+        ...
+        Running time: <ms> ms
+
+    Nodes are written with their labels (see NodeIds.py). Each time step is formatted as one string and written through
+    a large buffer, instead of one write per component.
+
+    With --output-mode labels, the components of a time step are written as the component id of each active node:
+
+                {'<node>': <component id>, '<node>': <component id>, ...}
+
+    and with --output-mode summary only their number and sizes are:
+
+            Number of Components: <count>
+            Largest Component: <size>
+            Component Sizes: {<size>: <number of components of that size>, ...}
+
+Columnar components (.comps):
+
+    The same components as node ids, in flat arrays:
+
+        header      56 bytes: magic b'APSGCOMP', format version (uint32), reserved (uint32), N (uint64), TS (uint64),
+                    C = total number of components (uint64), M = total number of members (uint64), total running time
+                    in ms (float64)
+        members     M int32 node ids: the members of component 0, then those of component 1, ... Components are
+                    numbered across time steps, those of step 0 first.
+        steps       (TS + 1) uint64: the components of step t are components steps[t] .. steps[t + 1] - 1
+        components  (C + 1) uint64: the members of component c are entries components[c] .. components[c + 1] - 1 of
+                    the members
+        times       TS float64: running time of each time step, in ms
+
+    Members are streamed to the file as steps are written, the (small) index arrays are appended at the end. Writing a
+    step is a few array copies instead of formatting every node, and the reader memory-maps the file, so reading the
+    components of one time step touches only that step.
+
+    Component labels hold the same information, so --output-mode labels writes the same file (ComponentsFile.stepLabels
+    reads it back as labels). Summaries are only written as text.
+
+All integers are little-endian.
+"""
+import itertools
+import os
+import struct
+
+import numpy as np
+
+# File extension of each format
+TEXT = '.txt'
+COMPONENTS = '.comps'
+
+# Output formats by the name used on the command line (--output-format)
+EXTENSIONS = {'text': TEXT, 'comps': COMPONENTS}
+
+# Size of the write buffer of output files, in bytes
+BUFFER_SIZE = 8 * 1024 * 1024
+
+# Columnar components header: magic, version, reserved, N, TS, C, M, total running time
+COMPONENTS_MAGIC = b'APSGCOMP'
+COMPONENTS_HEADER = struct.Struct('<8sIIQQQQd')
+COMPONENTS_VERSION = 1
+
+
+# Create a writer for an output file.
+#
+# @param path path of the file to create
+# @param outputFormat format name, a key of EXTENSIONS
+# @param nodeIds NodeIds of the graph
+# @return a writer with writeStep(t, components, runningTime), writeLabels(t, nodes, labels, runningTime) and
+#         writeRunningTime(runningTime), to be used as a context manager. Text writers also have
+#         writeSummary(t, componentSizes, runningTime).
+def openOutputFile(path, outputFormat, nodeIds):
+    writers = {'text': TextWriter, 'comps': ComponentsWriter}
+    return writers[outputFormat](path, nodeIds)
+
+
+# Write the text output format. Use as a context manager:
+#
+#   with TextWriter(path, nodeIds) as writer:
+#       for t in range(TS):
+#           writer.writeStep(t, listOfActiveComponents, runningTime)
+#       writer.writeRunningTime(totalRunningTime)
+class TextWriter:
+
+    # @param path path of the file to create
+    # @param nodeIds NodeIds of the graph, used to write node labels
+    def __init__(self, path, nodeIds):
+        self.nodeIds = nodeIds
+        self.path = path
+        self.file = open(path, 'w', buffering=BUFFER_SIZE)
+
+    # Write the active components of time stamp t.
+    #
+    # @param t time stamp
+    # @param listOfActiveComponents list of active components, each a set of int node ids
+    # @param runningTime time spent finding the components, in seconds
+    def writeStep(self, t, listOfActiveComponents, runningTime):
+        lines = ["ts_" + str(t) + ":\n", "\tActive Component(s):\n"]
+
+        for component in listOfActiveComponents:
+            # Nodes are written as quoted labels, the way a set of node labels prints. They are sorted by node id so
+            # that the output does not depend on the iteration order of the set (which differs once a set has been
+            # pickled, e.g. by a worker process).
+            lines.append("\t\t{" + ", ".join(repr(label) for label in self.nodeIds.labelsOf(sorted(component))) +
+                         "}\n")
+
+        self.writeLines(lines, runningTime)
+
+    # Write the component id of each active node of time stamp t.
+    #
+    # @param t time stamp
+    # @param activeNodes int array of the active nodes
+    # @param componentLabels int array, the component id of each node of activeNodes
+    # @param runningTime time spent finding the components, in seconds
+    def writeLabels(self, t, activeNodes, componentLabels, runningTime):
+        labels = self.nodeIds.labelsOf(activeNodes.tolist())
+
+        lines = ["ts_" + str(t) + ":\n", "\tComponent Labels:\n",
+                 "\t\t{" + ", ".join(repr(label) + ": " + str(componentId)
+                                      for label, componentId in zip(labels, componentLabels.tolist())) + "}\n"]
+
+        self.writeLines(lines, runningTime)
+
+    # Write summary statistics of the active components of time stamp t.
+    #
+    # @param t time stamp
+    # @param componentSizes int array of the size of each active component
+    # @param runningTime time spent finding the components, in seconds
+    def writeSummary(self, t, componentSizes, runningTime):
+        # Number of components of each size
+        sizeCounts = np.bincount(componentSizes)
+        sizes = np.flatnonzero(sizeCounts)
+
+        lines = ["ts_" + str(t) + ":\n",
+                 "\tNumber of Components: " + str(len(componentSizes)) + "\n",
+                 "\tLargest Component: " + str(int(componentSizes.max()) if len(componentSizes) > 0 else 0) + "\n",
+                 "\tComponent Sizes: {" + ", ".join(str(size) + ": " + str(count) for size, count in
+                                                     zip(sizes.tolist(), sizeCounts[sizes].tolist())) + "}\n"]
+
+        self.writeLines(lines, runningTime)
+
+    # Write the lines of a time stamp, followed by its running time and the separator line.
+    def writeLines(self, lines, runningTime):
+        lines.append("\tRunning time per time stamp: " + str(runningTime * 1000) + " ms" + "\n")
+        lines.append("--------------------------------------------------\n")
+
+        self.file.write("".join(lines))
+
+    # Write the total running time, after the last time stamp.
+    #
+    # @param runningTime total running time, in seconds
+    def writeRunningTime(self, runningTime):
+        self.file.write("Running time: " + str(runningTime * 1000) + " ms")
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    # Close the file, or delete it if the with block raised, e.g. because the input file could not be read
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.close()
+        else:
+            self.file.close()
+            os.remove(self.path)
+
+
+# Write the columnar components format. Use as a context manager, like TextWriter.
+class ComponentsWriter:
+
+    # @param path path of the file to create
+    # @param nodeIds NodeIds of the graph
+    def __init__(self, path, nodeIds):
+        self.numOfNodes = nodeIds.numOfNodes
+
+        # steps[t] is the number of components written before step t
+        self.steps = [0]
+
+        # components[c] is the number of members written before component c
+        self.components = [0]
+
+        # Running time of each step, in ms
+        self.times = []
+
+        self.runningTime = 0.0
+
+        self.path = path
+        self.file = open(path, 'wb', buffering=BUFFER_SIZE)
+
+        # Leave room for the header, it is filled in by close() once the totals are known
+        self.file.write(bytes(COMPONENTS_HEADER.size))
+
+    # Write the active components of the next time stamp.
+    #
+    # @param t time stamp, must be the number of steps written so far
+    # @param listOfActiveComponents list of active components, each an iterable of int node ids
+    # @param runningTime time spent finding the components, in seconds
+    def writeStep(self, t, listOfActiveComponents, runningTime):
+        if t != len(self.times):
+            raise ValueError("Expected time step " + str(len(self.times)) + ", got " + str(t))
+
+        sizes = [len(component) for component in listOfActiveComponents]
+        members = np.fromiter(itertools.chain.from_iterable(listOfActiveComponents), dtype='<i4', count=sum(sizes))
+
+        self.file.write(members.tobytes())
+
+        self.components.extend((self.components[-1] + np.cumsum(sizes, dtype=np.int64)).tolist())
+        self.steps.append(len(self.components) - 1)
+        self.times.append(runningTime * 1000)
+
+    # Write the next time stamp from the component id of each active node.
+    #
+    # @param t time stamp, must be the number of steps written so far
+    # @param activeNodes int array of the active nodes
+    # @param componentLabels int array, the component id of each node of activeNodes
+    # @param runningTime time spent finding the components, in seconds
+    def writeLabels(self, t, activeNodes, componentLabels, runningTime):
+        # Group the nodes by component id
+        order = np.argsort(componentLabels, kind='stable')
+        sortedLabels = componentLabels[order]
+        bounds = np.flatnonzero(sortedLabels[1:] != sortedLabels[:-1]) + 1
+
+        self.writeStep(t, np.split(np.asarray(activeNodes)[order], bounds) if len(order) > 0 else [], runningTime)
+
+    # @param runningTime total running time, in seconds
+    def writeRunningTime(self, runningTime):
+        self.runningTime = runningTime * 1000
+
+    def close(self):
+        self.file.write(np.array(self.steps, dtype='<u8').tobytes())
+        self.file.write(np.array(self.components, dtype='<u8').tobytes())
+        self.file.write(np.array(self.times, dtype='<f8').tobytes())
+
+        self.file.seek(0)
+        self.file.write(COMPONENTS_HEADER.pack(COMPONENTS_MAGIC, COMPONENTS_VERSION, 0, self.numOfNodes,
+                                               len(self.times), len(self.components) - 1, self.components[-1],
+                                               self.runningTime))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    # Close the file, or delete it if the with block raised, like TextWriter
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.close()
+        else:
+            self.file.close()
+            os.remove(self.path)
+
+
+# Read-only, memory-mapped view of a columnar components file
+class ComponentsFile:
+
+    # @param path path of a .comps file
+    def __init__(self, path):
+        with open(path, 'rb') as outputFile:
+            magic, version, _, numOfNodes, numOfSteps, numOfComponents, numOfMembers, runningTime = \
+                COMPONENTS_HEADER.unpack(outputFile.read(COMPONENTS_HEADER.size))
+
+        if magic != COMPONENTS_MAGIC or version != COMPONENTS_VERSION:
+            raise ValueError(path + " is not a columnar components file")
+
+        self.numOfNodes = numOfNodes
+        self.numOfSteps = numOfSteps
+
+        # Total running time, in ms
+        self.runningTime = runningTime
+
+        offset = COMPONENTS_HEADER.size
+
+        if numOfMembers > 0:
+            self.members = np.memmap(path, dtype='<i4', mode='r', offset=offset, shape=(numOfMembers,))
+        else:
+            # np.memmap can't map an empty region
+            self.members = np.zeros(0, dtype='<i4')
+        offset = offset + 4 * numOfMembers
+
+        self.steps = np.memmap(path, dtype='<u8', mode='r', offset=offset, shape=(numOfSteps + 1,))
+        offset = offset + 8 * (numOfSteps + 1)
+
+        self.components = np.memmap(path, dtype='<u8', mode='r', offset=offset, shape=(numOfComponents + 1,))
+        offset = offset + 8 * (numOfComponents + 1)
+
+        if numOfSteps > 0:
+            self.times = np.memmap(path, dtype='<f8', mode='r', offset=offset, shape=(numOfSteps,))
+        else:
+            self.times = np.zeros(0, dtype='<f8')
+
+    # @return list of the active components of time step t, each an int32 array of node ids
+    def stepComponents(self, t):
+        if self.steps[t] == self.steps[t + 1]:
+            return []
+
+        bounds = self.components[self.steps[t]:self.steps[t + 1] + 1]
+        return np.split(self.members[bounds[0]:bounds[-1]], (bounds[1:-1] - bounds[0]).astype(np.int64))
+
+    # @return int array of the size of each active component of time step t
+    def componentSizes(self, t):
+        return np.diff(self.components[self.steps[t]:self.steps[t + 1] + 1]).astype(np.int64)
+
+    # @return (int32 array of the active nodes of time step t, int array of the component id of each of them)
+    def stepLabels(self, t):
+        sizes = self.componentSizes(t)
+        bounds = self.components[self.steps[t]:self.steps[t + 1] + 1]
+
+        if len(sizes) == 0:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64)
+
+        return np.asarray(self.members[bounds[0]:bounds[-1]]), np.repeat(np.arange(len(sizes)), sizes)
+
+    # @return running time of time step t, in ms
+    def stepRunningTime(self, t):
+        return float(self.times[t])
+
+
+# Open an output file for reading, based on its extension.
+#
+# @param path path of the output file
+# @return a ComponentsFile, or None if path is not a binary output file
+def readOutputFile(path):
+    if os.path.splitext(path)[1] == COMPONENTS:
+        return ComponentsFile(path)
+
+    return None
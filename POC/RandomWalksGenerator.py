@@ -12,30 +12,44 @@ The synthetic data represents active components over time steps [0, t]. Syntheti
 
     3) End up with a random-walk which represents an active connected component.
 
-    4) Repeat for a fixed number numOfRandomWalks
+    4) Repeat for a fixed number numOfRandomWalks (--walks). The walks are generated in batches that take their steps
+       together, see randomWalks.
 
     5) Each random-walk will be assigned a time duration [t, t'], where t' can be adjusted with param k.
 
     6) Now each time step: 0, 1, 2..etc. will have a list of random-walks (i.e. active paths).
        e.g. t1: {[A,B,C], [CDE]}, t2: {[A,B,C], [D,F]}
+       These lists are not stored: walks are kept in flat arrays with their durations, and the walks of a time step are
+       looked up in an index of the durations when needed (see Walks.py).
 
     7) An input file is then generated based on the paths. The input file is a matrix of 0's and 1's.
        node 'i' at timestep 'j' is active if it has value 1 (e.g. inputMatrix[i][j] == 1)
+       The matrix is written as a tab separated CSV file, or in a binary format with --format bits, sparse or events
+       (see InputFormats.py). All formats are written straight from the [start, end] interval of each walk, without
+       building the matrix.
+
+Usage:
+    python3 RandomWalksGenerator.py <graph folder name> [--format csv|bits|sparse|events] [--walks WALKS] [--seed SEED]
+                                   [-v] [--trace FILE]
+
+    Nothing is printed by default: -v reports each stage, -vv each time step, --trace writes them to a file (see
+    GeneratorLog.py).
 
 @author Sami Tarazi
 """
+import argparse
+import collections
 import datetime
+import logging
 import os
-import sys
-import random
-import itertools
-
-from random import choice
-
-import networkx as nx
 
 import numpy as np
 
+from CSRGraph import loadGraph, readGraphHeader
+from GeneratorLog import addLogArguments, configureLog, isEnabled, logEvent
+from InputFormats import EXTENSIONS, createWriter
+from Walks import Walks
+
 # Number of time steps
 TS = 100
 
@@ -45,263 +59,289 @@ numOfRandomWalks = TS + 100
 # Random Walk probability
 alpha = 0.95
 
-# Get graph path from input
-graphPath = str(sys.argv[1])
+# Number of random-walks generated together (see randomWalks). Memory is about 4 bytes x the length of the longest walk
+# per walk of a batch.
+WALK_BATCH_SIZE = 65536
+
+# Number of times the next node of a walk is drawn among all neighbours before only unvisited ones are considered
+REJECTION_TRIES = 3
+
+# Number of rows (nodes) of a CSV input file built and written at a time
+CSV_CHUNK_SIZE = 10000
 
 tStamp = datetime.datetime.now().strftime('%m-%d--%H-%M-%S').format()
 
 
 def main():
 
-    tStamp = timeStamp()
-    print(tStamp)
-    # Load graph into memory
-    graphFile = open(graphPath + "/Graph.txt", 'rb')
-    G = nx.read_adjlist(graphFile)
+    args = parseArguments()
+    configureLog(args)
+
+    # Get graph path from input
+    graphPath = args.graphPath
+
+    # tStamp is the time stamp of the output file names (see nameFile)
+    logEvent('start', logging.INFO, graph=graphPath, timeStamp=tStamp, walks=args.walks, TS=TS, alpha=alpha)
+
+    # Load graph, memory-mapped from its binary cache
+    G = loadGraph(graphPath)
+
+    # Number of nodes, read from the graph metadata. Used to size the input matrix.
+    global graphN
+    graphN = readGraphHeader(graphPath)['N']
+
+    # Random number generator. Runs with the same seed generate the same input file.
+    rng = np.random.default_rng(args.seed)
 
     # generate random-walks. Do not visit nodes twice
-    randomWalks = generateRandomWalks(G)
+    randomWalks = generateRandomWalks(G, args.walks, rng)
+    logEvent('walks', logging.INFO, count=len(randomWalks), nodes=len(randomWalks.nodes))
 
     # Assign a time step DURATION to each Random Walk.
     # Walk starts at a random t and ends at t + k
-    # return walksMap[0] = [t, t + k] and walksMap[1] = [PATH]
-    # e.g. randomWalk_1: {[1,3], [A,B,C]}
-    walksMap = assignTimeSteps(randomWalks, k=2)
-
-    # Break each time step duration into a single time step.
-    # Return a list of random-walks for each single time step
-    timeMap = listByTime(walksMap)
-    print(timeMap)
+    # The walks active at each single time step are then found on demand (see Walks.py)
+    assignTimeSteps(randomWalks, 2, rng)
 
     # Aggregate random walks for each time step. This converts walks into connected components.
-    aggregateTimeMap = aggregateRandomWalks(timeMap, G)
+    aggregateTimeMap = aggregateRandomWalks(randomWalks, G)
+    # Counting the components goes through every time step, only do it if the event is written
+    if isEnabled(logging.INFO):
+        logEvent('components', logging.INFO, count=sum(len(components) for components in aggregateTimeMap.values()))
 
     # Save random-walks and save time steps
-    saveRandomWalks(walksMap, graphPath)
-    saveTimeMap(aggregateTimeMap, walksMap, graphPath)
+    saveRandomWalks(randomWalks, graphPath, G.nodeIds)
+    saveTimeMap(aggregateTimeMap, graphPath, G.nodeIds)
 
     # Generate node data based on active paths. Active node = 1, otherwise = 0
-    inputFilePath, inputFileName = genInputFile(graphPath,aggregateTimeMap)
-
-
-# Generate random-walks on graph G
-# Store all walks in a list
-# Return list of random-walks
-def generateRandomWalks(G):
-    # List to store random-walks
-    randomWalks = []
-    i = 1
-
-    # Create a fixed number of random-walks. The number is denoted by variable 'numOfRandomWalks'
-    while i <= numOfRandomWalks:
-        # Get random-walk
-        walk = randomWalk(G)
-
-        # Add random-walk to list of walks
-        randomWalks.append(walk)
-        i = i + 1
-
-    return randomWalks
-
-
-# Random-walk on graph G with probability Alpha:
-#   1) Choose a node uniformly at random
-#   2) Visit one of its neighbours with probability Alpha, or stop with probability 1 - Alpha
-#   3) Repeat step 2 until stopping
+    # The input file comes straight from the walk durations
+    genInputFile(graphPath, randomWalks, args.format)
+
+
+# Parse command line arguments:
+#   python3 RandomWalksGenerator.py <graph folder name> [--format csv|bits|sparse|events] [--walks WALKS] [--seed SEED]
+#                                   [-v] [--trace FILE]
+def parseArguments():
+    parser = argparse.ArgumentParser(description='Generate an input file from random-walks on a graph')
+    parser.add_argument('graphPath', help='graph folder name, e.g. GRAPH_SW_N20_E80_P0.15_K8_T100')
+    parser.add_argument('--format', choices=['csv'] + list(EXTENSIONS), default='csv',
+                        help='input file format: tab separated matrix, bit-packed matrix, sparse active lists or '
+                             'event stream (default: csv)')
+    parser.add_argument('--walks', type=int, default=numOfRandomWalks,
+                        help='number of random-walks (default: ' + str(numOfRandomWalks) + ')')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the random-walks and of their time steps')
+    addLogArguments(parser)
+    return parser.parse_args()
+
+
+# Generate random-walks on graph G, WALK_BATCH_SIZE walks at a time (see randomWalks)
+# Return the random-walks, as Walks without time steps
+def generateRandomWalks(G, numOfWalks=numOfRandomWalks, rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
+
+    batches = [randomWalks(G, min(WALK_BATCH_SIZE, numOfWalks - batchStart), rng)
+               for batchStart in range(0, numOfWalks, WALK_BATCH_SIZE)]
+
+    return Walks.concatenate(batches)
+
+
+# Random-walks on graph G with probability Alpha, all advanced together one step at a time:
+#   1) Choose a start node uniformly at random for every walk
+#   2) Draw the number of steps of every walk: it continues with probability Alpha after each step, so the number of
+#      steps before stopping is geometric, 0 with probability 1 - Alpha
+#   3) At each step, every walk that still has steps to go moves to a neighbour of its last node chosen uniformly at
+#      random among those it has not visited, or stops if there is none
 # Note: Do not visit the same node twice
-# Return list of nodes to represent the random-walk
-def randomWalk(G):
-    allNodes = G.nodes()
-    visitedNodes = {}
-    stack = [] # Stack is needed if we consider re-visiting nodes
-    result_randomWalk = []     # final random-walk to be returned
-
-    # Choose node uniformly at random from the original graph G
-    currentRandomNode = choice(list(allNodes))
-
-    # push node into stack and mark as visited
-    stack.append(currentRandomNode)
-    visitedNodes[currentRandomNode] = True
-    result_randomWalk.append(currentRandomNode) # Add node to result
-
-    x = 0
-
-    # Keep visiting neighbours based on Alpha probability
-    while len(stack) > 0 and generateProbability():
-
-        print("Current Node: " + str(currentRandomNode))
-        print("Stack: " + str(stack))
-        print("Visited Nodes: " + str(visitedNodes))
-
-        # Get neighbours of current node
-        neighbors = list(G.neighbors(currentRandomNode))
-
-        print("Number of Neighbors: " + str(len(neighbors)))
-
-        # if node has neighbours
-        if len(neighbors) > 0:
-            # Choose a neighbor uniformly at random
-            randomNeighbor = choice(neighbors)
-
-            # Check if neighbor is visited. If yes:
-            # remove it from the list of neighbours. Then pick another neighbour.
-            while randomNeighbor in visitedNodes:
-                print("Neighbour Exists! now removing: " + str(randomNeighbor))
-                neighbors.remove(randomNeighbor)
-                if len(neighbors) > 0:
-                    randomNeighbor = choice(neighbors)
-                else:
-                    break
-
-            if len(neighbors) > 0: # if there exists an unvisited neighbor then add it
-                # print neighbor
-                print ("Neighbour Found: " + str(randomNeighbor))
-
-                # Add random neighbor to stack, mark as visited, and add to final path
-                stack.append(randomNeighbor)
-                visitedNodes[randomNeighbor] = True
-                result_randomWalk.append(randomNeighbor)
-                currentRandomNode = randomNeighbor
-            else: # if all neighbors are visited, stop.
-                # currentRandomNode = stack.pop()
-                break
-
-        x = x + 1
-        print("==========")
-        print(str(len(stack)))
-    return result_randomWalk
-
-
-# Generate a probability value based on a given alpha
-# Choose a number uniformly at random from 1, 100 inclusive.
-# If number is less than or equal alpha * 100, return true. Else, false
-def generateProbability():
-    maxInt = 100
-    num = random.randint(1, maxInt)
-    alphaProbability = alpha * maxInt
-    if num <= alphaProbability:
-        return True
-    elif num > alphaProbability or num <= maxInt:
-        return False
+#
+# Each walk is a row of a numOfWalks x (longest walk) matrix. Choosing the next nodes is a few NumPy operations over the
+# walks still going (see chooseNeighbours), so a step costs no Python work per walk.
+#
+# @param G graph, as a CSRGraph
+# @param numOfWalks number of walks
+# @param rng numpy random Generator
+# @return Walks, without time steps
+def randomWalks(G, numOfWalks, rng):
+    # Number of steps of each walk
+    targetLengths = rng.geometric(1 - alpha, size=numOfWalks) - 1
+
+    paths = np.zeros((numOfWalks, targetLengths.max(initial=0) + 1), dtype=np.int32)
+    paths[:, 0] = rng.integers(G.number_of_nodes(), size=numOfWalks)
+
+    # Number of nodes of each walk
+    lengths = np.ones(numOfWalks, dtype=np.int64)
+
+    # Walks still going, and the step they are taking
+    walking = np.flatnonzero(targetLengths > 0)
+    step = 1
+
+    while len(walking) > 0:
+        nextNodes = chooseNeighbours(G, paths[walking, :step], paths[walking, step - 1], rng)
+
+        # Walks with no unvisited neighbour stop here
+        moved = nextNodes >= 0
+        walking = walking[moved]
+
+        paths[walking, step] = nextNodes[moved]
+        lengths[walking] = step + 1
+
+        step = step + 1
+        walking = walking[targetLengths[walking] >= step]
+
+    # The rows, without their unused entries, back to back
+    offsets = np.zeros(numOfWalks + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    return Walks(paths[np.arange(paths.shape[1]) < lengths[:, np.newaxis]], offsets)
+
+
+# Choose the next node of many walks at once: a neighbour of the last node of each walk, uniformly at random among the
+# neighbours the walk has not visited.
+#
+# A neighbour is first drawn among all neighbours, and drawn again while it has been visited, up to REJECTION_TRIES
+# times; this keeps the work per walk to one row comparison per draw. The few walks still without a node after that get
+# the exact draw: all their neighbours are gathered from the CSR arrays, the visited ones dropped, and one of the rest
+# chosen. Both are uniform over the unvisited neighbours.
+#
+# @param G graph, as a CSRGraph
+# @param visitedNodes int matrix, row i holds the nodes visited by walk i
+# @param lastNodes int array, the last node of each walk
+# @param rng numpy random Generator
+# @return int array, the next node of each walk, -1 for walks with no unvisited neighbour
+def chooseNeighbours(G, visitedNodes, lastNodes, rng):
+    # Plain views of the (memory-mapped) CSR arrays, cheaper to index
+    offsets = np.asarray(G.offsets)
+    graphNeighbours = np.asarray(G.neighbours)
+
+    starts = offsets[lastNodes].astype(np.int64)
+    degrees = offsets[lastNodes + 1] - starts
+
+    nextNodes = np.full(len(lastNodes), -1, dtype=np.int64)
+
+    # Walks with a neighbour to go to, as far as we know
+    pending = np.flatnonzero(degrees > 0)
+
+    for _ in range(REJECTION_TRIES):
+        candidates = graphNeighbours[starts[pending] + (rng.random(len(pending)) * degrees[pending]).astype(np.int64)]
+        unvisited = ~(visitedNodes[pending] == candidates[:, np.newaxis]).any(axis=1)
+
+        nextNodes[pending[unvisited]] = candidates[unvisited]
+        pending = pending[~unvisited]
+
+    if len(pending) > 0:
+        # Every neighbour of the remaining walks, and the walk (row of pending) each belongs to
+        neighbours = G.neighborsOf(lastNodes[pending])
+        owners = np.repeat(np.arange(len(pending)), degrees[pending])
+
+        unvisitedEntries = np.flatnonzero(~(visitedNodes[pending[owners]] == neighbours[:, np.newaxis]).any(axis=1))
+
+        # Unvisited neighbours of each walk, which are consecutive in unvisitedEntries
+        counts = np.bincount(owners[unvisitedEntries], minlength=len(pending))
+        firstEntries = np.cumsum(counts) - counts
+
+        choosing = counts > 0
+        picks = firstEntries[choosing] + (rng.random(np.count_nonzero(choosing)) * counts[choosing]).astype(np.int64)
+        nextNodes[pending[choosing]] = neighbours[unvisitedEntries[picks]]
+
+    return nextNodes
+
+
+# Assign each random-walk a random time step duration [t, t + k]
+#   randomWalks: Walks, indexed by time step once this returns
+#   k: number of time steps a walk stays active after its first one
+#   rng: numpy random Generator
+def assignTimeSteps(randomWalks, k, rng):
+    # Max time steps
+    maxTime = TS - 1
 
+    # Pick a start time step uniformly at random from [1, max time steps]
+    startTimes = rng.integers(1, maxTime + 1, size=len(randomWalks))
 
-# Assign each random-walk a random time step
-# Return walksMap[0] = [t, t + k] and walksMap[1] = [PATH]
-def assignTimeSteps(randomWalks, k):
-    # Store data
-    randomWalksMap = {}
+    # Calculate end time by: adding startTime + k
+    # If endTime is out of bounds: endTime = maxTime
+    # This is the case when startTime + k is bigger than the allowed time steps
+    endTimes = np.minimum(startTimes + k, maxTime)
 
-    # Max time steps
-    maxTime = TS - 1
+    randomWalks.setTimes(startTimes, endTimes)
 
-    i = 1
-    # Loop through all random-walks
-    for walk in randomWalks:
-        # Pick a start time step uniformly at random from [1, max time steps]
-        startTime = random.randint(1, maxTime)
 
-        # Calculate end time by: adding startTime + k
-        endTime = startTime + k
+# Generate the connected components for each time step
+# For each timestep, mark the nodes of its walks as active, then explore the graph from each active node through active
+# nodes only. The graph itself is shared by all time steps and never copied or modified: a time step costs
+# O(active nodes + edges of active nodes), whatever the size of the graph.
+#   randomWalks: Walks, with time steps
+#   G: graph, as a CSRGraph
+# Return dict: time step -> list of active components (sets of node ids), for the time steps with active walks
+def aggregateRandomWalks(randomWalks, G):
+    aggregateTimeMap = {}
 
-        # If endTime is out of bounds: endTime = maxTime
-        # This is the case when startTime + k is bigger than the allowed time steps
-        if endTime > maxTime:
-            endTime = maxTime
+    # Active flag of each node. Only the nodes of the current time step are set, and they are cleared after it.
+    active = np.zeros(G.number_of_nodes(), dtype=bool)
 
-        timeStep = str(startTime) + "," + str(endTime)
-        path = walk
+    for t in range(TS):
+        activeWalks = randomWalks.activeAt(t)
+        if len(activeWalks) == 0:
+            continue
 
-        randomWalksMap["RandomWalk_" + str(i)] = [timeStep, path]
-        i = i + 1
+        # Active nodes, each once
+        activeNodes = np.unique(randomWalks.nodesOf(activeWalks))
 
-    return randomWalksMap
+        active[activeNodes] = True
 
+        # Generate active connected components, as sets of node ids
+        aggregateTimeMap[t] = sorted(activeComponents(G, activeNodes, active), key=len, reverse=True)
 
-# For each time step, assign the list of walks that are active on that step
-def listByTime(walksMap):
-    i = 0
-    timeMap = {}
+        active[activeNodes] = False
 
-    # For each walk, get lower-bound and upper-bound of the duration
-    # Then, start at lower-bound time step and append the path until upper-bound time step
-    # Repeat for all walks
-    for walk in walksMap:
-        # walksMap[walk] = {[t, t'], [path]}
-        # index 0 of each walk is the time duration
-        time = (walksMap[walk][0]).split(',')
-        lowerBound = int(time[0])
-        upperBound = int(time[1])
+        logEvent('step', t=t, walks=len(activeWalks), activeNodes=len(activeNodes), components=len(aggregateTimeMap[t]))
 
-        # walksMap[walk] = {[t, t'], [path]}
-        # index 1 of each walk is the actual path
-        path = walksMap[walk][1]
+    return aggregateTimeMap
 
-        # Here appending the path for each time step per walk.
-        for t in range(lowerBound, upperBound + 1):
-            if int(t) in timeMap:
-                timeMap[int(t)].append(path)
-            else:
-                walksList = [path]
-                timeMap[int(t)] = walksList
 
-    return timeMap
+# Find the connected components of the subgraph induced by the active nodes, with one BFS per component.
+#
+# @param G graph, as a CSRGraph
+# @param activeNodes int array of the active nodes, each once
+# @param active bool array of length N, True for the active nodes
+# @return list of active components, each a set of int node ids
+def activeComponents(G, activeNodes, active):
+    components = []
+    visitedNodes = set()
 
+    for node in activeNodes.tolist():
+        if node in visitedNodes:
+            continue
 
-# Generate the connected components for each time step
-# For each timestep, create 1D nodesMatrix (array).
-# For each node, if a node is active then nodesMatrix[index of node] = 1
-# Then create a subgraph that only consists of active nodes and get connected components
-def aggregateRandomWalks(timeMap, G):
-    numOfNodes = G.number_of_nodes()
-    global graphN
-    graphN = numOfNodes
-    aggregateTimeMap = {}
+        component = {node}
+        queue = collections.deque([node])
 
-    for t in timeMap:
-        # Make a copy of current graph
-        newG = G.copy()
-
-        # Mark active nodes in a 1D matrix
-        nodesMatrix = np.zeros((1, numOfNodes), dtype=np.int64)
-        for node in timeMap[t]:
-            node = list(map(int, node))
-            print(node)
-            nodesMatrix[0, node] = 1
-
-        # Go through all active nodes and get list of connected components by removing inactive nodes from graph
-        i = 0
-        while i <= numOfNodes - 1:
-            if nodesMatrix[0,i] == 0:
-                newG.remove_node(str(i))
-            i = i + 1
-
-        # Generate active connected components
-        for c in sorted(nx.connected_components(newG), key=len, reverse=True):
-            if int(t) in aggregateTimeMap: # if time exists, append its connected component
-                aggregateTimeMap[int(t)].append(c)
-            else: # if time doesn't exist, add the time with its connected component
-                walksList = [c]
-                aggregateTimeMap[int(t)] = walksList
-        print("--------")
+        while len(queue) > 0:
+            for neighbour in G.neighbors(queue.popleft()).tolist():
+                if active[neighbour] and neighbour not in component:
+                    component.add(neighbour)
+                    queue.append(neighbour)
 
-    return aggregateTimeMap
+        visitedNodes.update(component)
+        components.append(component)
+
+    return components
 
 
 # Save random walks in a txt file for analysis purposes
-def saveRandomWalks(walksMap, graphPath):
+# Paths are node ids, they are written as lists of node labels (see NodeIds.py)
+def saveRandomWalks(randomWalks, graphPath, nodeIds):
     inputFile = open(graphPath + '/Data/' + nameFile('randomWalks.txt'), 'w')
 
-    for walk in walksMap:
+    for walk in range(len(randomWalks)):
         # RandomWalk number
-        result = walk + "\n"
+        result = "RandomWalk_" + str(walk + 1) + "\n"
 
         # Time duration
         result = result + "\t" + "Time:"
-        result = result + "\t\t" + "[" + str(walksMap[walk][0]) + "]\n"
+        result = result + "\t\t" + "[" + str(randomWalks.starts[walk]) + "," + str(randomWalks.ends[walk]) + "]\n"
 
         # Path as a list of nodes
         result = result + "\t" + "Path:"
-        result = result + "\t\t" + "[" + str(walksMap[walk][1]) + "]\n"
+        result = result + "\t\t" + "[" + str(nodeIds.labelsOf(randomWalks.path(walk).tolist())) + "]\n"
 
         # Line break
         result = result + "--------------------------------------------------"
@@ -312,7 +352,8 @@ def saveRandomWalks(walksMap, graphPath):
 
 
 # Save random walks per time step in txt
-def saveTimeMap(timeMap, walksMap, graphPath):
+# Components are sets of node ids, they are written as sets of node labels (see NodeIds.py)
+def saveTimeMap(timeMap, graphPath, nodeIds):
     inputFile = open(graphPath + '/Data/' + nameFile('syntheticData.txt'), 'w')
     time = 0
 
@@ -326,7 +367,7 @@ def saveTimeMap(timeMap, walksMap, graphPath):
 
         if time in timeMap:
             for walk in timeMap[time]:
-                result = result + str("\t\t") + str(walk) + "\n"
+                result = result + str("\t\t") + "{" + ", ".join(repr(label) for label in nodeIds.labelsOf(walk)) + "}\n"
 
         # Line break
         result = result + "--------------------------------------------------"
@@ -344,50 +385,76 @@ def nameFile(fname):
     # return tStamp + '-' + 'ALPHA'+ str(activePercent) +'_TS'+ str(TS) + '_'+fname
 
 
-# File naming convention, to avoid duplicate names
-def timeStamp(fmt='%m-%d--%H-%M-%S'):
-    import datetime
-    # This creates a timestamped filename so we don't overwrite our good work
-    return datetime.datetime.now().strftime(fmt).format()
-
-
 # Generate node data based on active paths. Active node = 1, otherwise = 0
+# A node is active at a time step if a walk active at that time step goes through it. The time steps are swept in order
+# (see Walks.sweep), each one written as soon as it is known: its active nodes, or for event streams the nodes that
+# became active or inactive. Memory is O(active nodes), not O(N x TS).
 #   folderName: name of folder where graph is stored
-#   pathsData: dictionary of active paths from t=0 to t=n
-def genInputFile(folderName, timeMap):
-    print(timeMap)
-    # subFolderName = 'TS' + str(TS)
-    # inputFilePath = folderName + '/' + subFolderName
+#   randomWalks: Walks, with time steps
+#   fileFormat: 'csv' for a tab separated matrix, or the name of a binary format (see InputFormats.EXTENSIONS)
+def genInputFile(folderName, randomWalks, fileFormat='csv'):
+    if fileFormat == 'csv':
+        genCsvInputFile(folderName, randomWalks)
+        return
+
+    inputFileName = folderName + '/Data/' + nameFile('input') + EXTENSIONS[fileFormat]
+
+    with createWriter(inputFileName, fileFormat, graphN, TS) as writer:
+        for time, activeNodes, activated, deactivated in randomWalks.sweep(TS):
+            if fileFormat == 'events':
+                writer.writeEvents(activated, deactivated)
+            else:
+                writer.writeStep(activeNodes)
+
+            logEvent('inputStep', t=time, activeNodes=len(activeNodes), activated=len(activated),
+                     deactivated=len(deactivated))
 
-    # check if directory exists
-    # isNewDirectory = genDirectories(inputFilePath)
+    logEvent('inputFile', logging.INFO, path=inputFileName)
 
-    # create zeros matrix with 'number of nodes (graphN)' rows and 'max time steps (TS)' columns
-    # if isNewDirectory:
+
+# Generate the tab separated matrix: one row per node, one column per time step.
+# Rows are node by node, so the file can't be written one time step at a time. Instead, the duration of every walk is
+# copied to each of its nodes, these intervals are sorted by node, and the rows are built and written CSV_CHUNK_SIZE
+# nodes at a time. Memory is O(nodes of all walks + CSV_CHUNK_SIZE x TS).
+#   folderName: name of folder where graph is stored
+#   randomWalks: Walks, with time steps
+def genCsvInputFile(folderName, randomWalks):
     CSV = '.csv'
     inputFileName = folderName + '/Data/' + nameFile('input') + CSV
 
-    nodeMatrix = np.zeros((graphN, TS), dtype=np.int64)
-    print("graphN = " + str(graphN))
+    # Interval [start, end] of every node of every walk, sorted by node
+    lengths = randomWalks.lengths()
+    order = np.argsort(randomWalks.nodes, kind='stable')
+    nodes = randomWalks.nodes[order]
+    starts = np.repeat(randomWalks.starts, lengths)[order]
+    ends = np.repeat(randomWalks.ends, lengths)[order]
 
-    # Go through t = 0 until TS - 1 and list the random-walks for each time step
-    time = 0
-    while time <= TS - 1:
-        if time in timeMap:
-            for walk in timeMap[time]:
-                print(walk)
-                for node in walk:
-                    nodeMatrix[int(node), time] = 1
-        time = time + 1
+    with open(inputFileName, 'wb') as inputFile:
+        for firstNode in range(0, graphN, CSV_CHUNK_SIZE):
+            lastNode = min(firstNode + CSV_CHUNK_SIZE, graphN)
+            first, last = np.searchsorted(nodes, [firstNode, lastNode])
+            rows = nodes[first:last] - firstNode
+
+            # +1 at the start of each interval and -1 after its end: the running sum of a row is the number of walks
+            # going through its node at each time step
+            changes = np.zeros((lastNode - firstNode, TS + 1), dtype=np.int32)
+            np.add.at(changes, (rows, starts[first:last]), 1)
+            np.add.at(changes, (rows, ends[first:last] + 1), -1)
+
+            inputFile.write(csvRows(np.cumsum(changes[:, :TS], axis=1) > 0))
+
+    logEvent('inputFile', logging.INFO, path=inputFileName)
 
-    # convert the matrix into a tab separated file
-    np.savetxt(inputFileName, nodeMatrix, delimiter='\t', fmt='%d')
 
-    # return inputFilePath, inputFileName
-    return None, None
-    # else:
+# Format a matrix of 0's and 1's the way np.savetxt(delimiter='\t', fmt='%d') does, without a Python loop over rows
+#   matrix: bool matrix
+# Return the rows as bytes, each value followed by a tab, or by a line break at the end of a row
+def csvRows(matrix):
+    text = np.full((matrix.shape[0], 2 * matrix.shape[1]), ord('\t'), dtype=np.uint8)
+    text[:, 0::2] = ord('0') + matrix
+    text[:, -1] = ord('\n')
 
-    # return None, None
+    return text.tobytes()
 
 
 # generate directory to store data
@@ -399,4 +466,5 @@ def genDirectories(path):
         return False
 
 
-main()
+if __name__ == '__main__':
+    main()
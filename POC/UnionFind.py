@@ -0,0 +1,92 @@
+"""
+UnionFind.py
+
+Disjoint-set forest (union-find) over integer node ids, used to label active components in a single pass.
+
+How it works:
+
+    Every node starts as its own tree. union(a, b) attaches the root of the shorter tree under the root of the taller
+    one (union by rank), and find(a) points every node on the path it walks straight at the root (path compression).
+    Together they make any sequence of m operations on n nodes run in O(m * alpha(n)), i.e. near-linear.
+
+    Only nodes that are added are stored, so a forest for one time step costs O(active nodes) memory regardless of the
+    size of the original graph.
+"""
+
+
+class DisjointSet:
+
+    # @param nodes optional iterable of integer node ids to add as singleton sets
+    def __init__(self, nodes=()):
+        # parent[node] is the parent of node in its tree. Roots are their own parent.
+        self.parent = {}
+
+        # rank[root] is an upper bound on the height of the tree rooted at root
+        self.rank = {}
+
+        for node in nodes:
+            self.add(node)
+
+    # Add node as a singleton set. Adding an existing node does nothing.
+    def add(self, node):
+        if node not in self.parent:
+            self.parent[node] = node
+            self.rank[node] = 0
+
+    # @return True if node has been added
+    def __contains__(self, node):
+        return node in self.parent
+
+    # Find the root of the tree containing node, compressing the path on the way back.
+    #
+    # @param node an integer node id that has been added
+    # @return the root representing node's set
+    def find(self, node):
+        parent = self.parent
+
+        # Walk up to the root
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+
+        # Point every node on the path directly at the root
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+
+        return root
+
+    # Merge the sets containing a and b.
+    #
+    # @return True if a and b were in different sets, False if they were already connected
+    def union(self, a, b):
+        rootA = self.find(a)
+        rootB = self.find(b)
+
+        if rootA == rootB:
+            return False
+
+        # Attach the shorter tree under the taller one
+        if self.rank[rootA] < self.rank[rootB]:
+            rootA, rootB = rootB, rootA
+
+        self.parent[rootB] = rootA
+
+        if self.rank[rootA] == self.rank[rootB]:
+            self.rank[rootA] = self.rank[rootA] + 1
+
+        return True
+
+    # Group all nodes by the set they belong to.
+    #
+    # @return a list of sets, one per disjoint set
+    def groups(self):
+        groupsByRoot = {}
+
+        for node in self.parent:
+            root = self.find(node)
+            if root in groupsByRoot:
+                groupsByRoot[root].add(node)
+            else:
+                groupsByRoot[root] = {node}
+
+        return list(groupsByRoot.values())
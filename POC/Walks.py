@@ -0,0 +1,159 @@
+"""
+Walks.py
+
+Random-walks and the time steps they are active on, stored as flat arrays, with an index that finds the walks active at
+any time step or range of time steps.
+
+How it works:
+
+    The paths of all the walks are stored back to back in one int32 array of node ids, like the neighbours of a
+    CSRGraph:
+
+        nodes = [path of walk 0 | path of walk 1 | ... | path of walk W - 1]
+
+    and offsets[walk] .. offsets[walk + 1] is the slice holding the path of walk. Walk walk is active from time step
+    starts[walk] to time step ends[walk], both included.
+
+    Nothing is stored per time step. Instead, once the time steps are set, the walks are sorted by start and by end:
+        - the walks starting (or ending) at t are a slice of the walks sorted by start (or end), found by binary search
+        - a walk is active at t if it starts at t - maxDuration .. t and ends at t or later. The walks starting in that
+          window are a slice of the walks sorted by start, and only those are checked.
+    A query costs O(log W + number of walks starting in the window), and the active walks of every time step of a long
+    stream can be listed one step at a time, without ever building a list of walks per time step.
+
+    sweep goes through the time steps in order and turns the durations into the nodes that become active and inactive
+    at each of them, holding only the active nodes of the current step. Input files are written from it (see
+    RandomWalksGenerator.genInputFile).
+"""
+import numpy as np
+
+
+class Walks:
+
+    # @param nodes int array, the path of walk 0, then that of walk 1, ...
+    # @param offsets int array of length W + 1. The path of walk is nodes[offsets[walk]:offsets[walk + 1]]
+    def __init__(self, nodes, offsets):
+        self.nodes = np.asarray(nodes, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+        # First and last time step of each walk, and the index built from them (see setTimes)
+        self.starts = None
+        self.ends = None
+
+    # Concatenate several sets of walks, e.g. batches of walks generated separately.
+    #
+    # @param walksList list of Walks, without time steps
+    # @return Walks
+    @classmethod
+    def concatenate(cls, walksList):
+        lengths = np.concatenate([np.diff(walks.offsets) for walks in walksList] + [np.zeros(0, dtype=np.int64)])
+
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        return cls(np.concatenate([walks.nodes for walks in walksList] + [np.zeros(0, dtype=np.int32)]), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    # @return int32 array of the nodes of walk, in order. This is a view into the nodes array, do not modify it.
+    def path(self, walk):
+        return self.nodes[self.offsets[walk]:self.offsets[walk + 1]]
+
+    # @return int array of the number of nodes of every walk
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    # Nodes of many walks at once, without a Python loop over the walks.
+    #
+    # @param walks int array of walks
+    # @return int32 array of the nodes of walks[0], then those of walks[1], ... (with repetitions)
+    def nodesOf(self, walks):
+        starts = self.offsets[walks]
+        lengths = self.offsets[np.asarray(walks) + 1] - starts
+
+        firstEntries = np.cumsum(lengths) - lengths
+        positions = np.repeat(starts - firstEntries, lengths) + np.arange(lengths.sum())
+
+        return self.nodes[positions]
+
+    # Set the time steps of every walk, and index them.
+    #
+    # @param starts int array, the first time step of each walk
+    # @param ends int array, the last time step of each walk (included)
+    def setTimes(self, starts, ends):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+
+        # Walks sorted by start, and by end
+        self.byStart = np.argsort(self.starts, kind='stable')
+        self.sortedStarts = self.starts[self.byStart]
+        self.byEnd = np.argsort(self.ends, kind='stable')
+        self.sortedEnds = self.ends[self.byEnd]
+
+        # Longest duration, bounds how long before t an active walk may have started
+        self.maxDuration = int((self.ends - self.starts).max(initial=0))
+
+    # @return int array of the walks whose first time step is t
+    def startingAt(self, t):
+        first, last = np.searchsorted(self.sortedStarts, [t, t + 1])
+        return self.byStart[first:last]
+
+    # @return int array of the walks whose last time step is t
+    def endingAt(self, t):
+        first, last = np.searchsorted(self.sortedEnds, [t, t + 1])
+        return self.byEnd[first:last]
+
+    # @return sorted int array of the walks active at time step t
+    def activeAt(self, t):
+        return self.activeBetween(t, t)
+
+    # @return sorted int array of the walks active at some time step of first .. last (included)
+    def activeBetween(self, first, last):
+        window = self.byStart[np.searchsorted(self.sortedStarts, first - self.maxDuration, 'left'):
+                              np.searchsorted(self.sortedStarts, last, 'right')]
+
+        return np.sort(window[self.ends[window] >= first])
+
+    # Sweep the time steps in order, turning the durations of the walks into the nodes that become active or inactive
+    # at each time step.
+    #
+    # A node is active while at least one walk going through it is. The sweep keeps the number of active walks going
+    # through each active node: at time step t, the nodes of the walks starting at t count +1, those of the walks that
+    # ended at t - 1 count -1, and the nodes whose count leaves or reaches 0 are the events of t. Only the active nodes
+    # of the current time step are held, whatever the number of nodes and time steps.
+    #
+    # @param numOfSteps number of time steps TS
+    # @return generator of (t, sorted int32 array of the nodes active at t, int32 array of the nodes that become active
+    #         at t, int32 array of the nodes that become inactive at t) for t = 0 .. TS - 1
+    def sweep(self, numOfSteps):
+        # Active nodes, sorted, and the number of active walks going through each
+        activeNodes = np.zeros(0, dtype=np.int32)
+        walkCounts = np.zeros(0, dtype=np.int64)
+
+        noNodes = np.zeros(0, dtype=np.int32)
+
+        for t in range(numOfSteps):
+            startingNodes = self.nodesOf(self.startingAt(t))
+            endingNodes = self.nodesOf(self.endingAt(t - 1))
+
+            if len(startingNodes) + len(endingNodes) == 0:
+                yield t, activeNodes, noNodes, noNodes
+                continue
+
+            # Add up the current counts and the changes, node by node
+            nodes, inverse = np.unique(np.concatenate((activeNodes, startingNodes, endingNodes)), return_inverse=True)
+            changes = np.concatenate((walkCounts, np.ones(len(startingNodes), dtype=np.int64),
+                                      np.full(len(endingNodes), -1, dtype=np.int64)))
+
+            previousCounts = np.zeros(len(nodes), dtype=np.int64)
+            previousCounts[inverse[:len(activeNodes)]] = walkCounts
+            counts = np.bincount(inverse.reshape(-1), weights=changes, minlength=len(nodes)).astype(np.int64)
+
+            activated = nodes[(previousCounts == 0) & (counts > 0)]
+            deactivated = nodes[(previousCounts > 0) & (counts == 0)]
+
+            activeNodes = nodes[counts > 0]
+            walkCounts = counts[counts > 0]
+
+            yield t, activeNodes, activated, deactivated
@@ -0,0 +1,63 @@
+"""
+Instructions:
+python3 BackendsTest.py
+
+Checks that the 'sets' and 'dynamic' backends of FindActivePathsImproved.py find the same active components. Random
+nodes of a small-world graph become active and inactive over many time stamps, both backends apply the same changes,
+and their components are compared with each other and with those networkx finds on the active subgraph.
+"""
+import os
+import random
+import sys
+import unittest
+
+import networkx as nx
+
+# The graph tools are in the parent folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from CSRGraph import CSRGraph
+from FindActivePathsImproved import BACKENDS
+
+# Number of time stamps per run
+NUM_OF_STEPS = 200
+
+
+class BackendsTest(unittest.TestCase):
+
+    def testRandomChurn(self):
+        for seed in range(3):
+            with self.subTest(seed=seed):
+                self.runRandomChurn(random.Random(seed), nx.watts_strogatz_graph(n=200, k=4, p=0.1, seed=seed))
+
+    # Activate and deactivate random nodes at each time stamp and compare the components of every backend.
+    #
+    # @param rng random.Random
+    # @param G networkx graph
+    def runRandomChurn(self, rng, G):
+        originalG = CSRGraph.fromNetworkx(G)
+        backends = {name: backend(originalG) for name, backend in BACKENDS.items()}
+
+        activeNodes = set()
+
+        for _ in range(NUM_OF_STEPS):
+            # Churn between 1% and 20% of the nodes, in either direction
+            changedNodes = set(rng.sample(range(G.number_of_nodes()), rng.randint(2, 40)))
+            setB = changedNodes & activeNodes
+            setC = changedNodes - activeNodes
+            activeNodes = (activeNodes - setB) | setC
+
+            expected = toSets(nx.connected_components(G.subgraph(activeNodes)))
+
+            for name, components in backends.items():
+                components.applyChanges(set(setB), set(setC))
+                self.assertEqual(toSets(components.getComponents()), expected, name)
+
+
+# @return set of frozensets, to compare lists of components regardless of their order
+def toSets(components):
+    return {frozenset(component) for component in components}
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Instructions:
+python3 DynamicConnectivityTest.py
+
+Randomized test of DynamicConnectivity.py. Vertices and edges are added and removed at random, and after every change
+the components (and a few connectivity queries) of the structure are compared with those networkx finds on the same
+graph.
+"""
+import os
+import random
+import sys
+import unittest
+
+import networkx as nx
+
+# The graph tools are in the parent folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from DynamicConnectivity import DynamicConnectivity
+
+# Number of vertices the random graphs are drawn from
+NUM_OF_VERTICES = 40
+
+# Number of random changes per run
+NUM_OF_CHANGES = 2000
+
+
+class DynamicConnectivityTest(unittest.TestCase):
+
+    def testRandomChanges(self):
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                self.runRandomChanges(random.Random(seed))
+
+    # Apply random changes to a DynamicConnectivity and to a networkx graph, and compare them after each change.
+    #
+    # @param rng random.Random
+    def runRandomChanges(self, rng):
+        connectivity = DynamicConnectivity()
+        G = nx.Graph()
+
+        for _ in range(NUM_OF_CHANGES):
+            change = rng.random()
+
+            if change < 0.5 or G.number_of_edges() == 0:
+                # Insert an edge, adding its vertices first if needed
+                u, v = rng.sample(range(NUM_OF_VERTICES), 2)
+                for vertex in (u, v):
+                    connectivity.addVertex(vertex)
+                    G.add_node(vertex)
+
+                connectivity.insertEdge(u, v)
+                G.add_edge(u, v)
+            elif change < 0.9:
+                u, v = rng.choice(list(G.edges()))
+                connectivity.deleteEdge(u, v)
+                G.remove_edge(u, v)
+            else:
+                vertex = rng.choice(list(G.nodes()))
+                connectivity.removeVertex(vertex)
+                G.remove_node(vertex)
+
+            self.assertEqual(connectivity.vertices, set(G.nodes()))
+            self.assertEqual(toSets(connectivity.components()), toSets(nx.connected_components(G)))
+
+            if G.number_of_nodes() > 1:
+                u, v = rng.sample(list(G.nodes()), 2)
+                self.assertEqual(connectivity.connected(u, v), nx.has_path(G, u, v))
+
+
+# @return set of frozensets, to compare lists of components regardless of their order
+def toSets(components):
+    return {frozenset(component) for component in components}
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,15 +5,22 @@ python3 OutputTest.py <graph-folder-name> <naive-output-file-name> <synthetic-da
 This script will compare both text files (naive output and synthetic data). A match/unmatch value will be appeneded at
 each time step to outline which active paths have been evaluated correctly or incorrectly.
 
-The files are compared line by line. When an active component is detected, it is sorted in both files and compared for
-equality.
+The files are compared line by line. When an active component is detected, its node labels are converted to node ids
+(see NodeIds.py), sorted in both files and compared for equality.
 """
 
 # Get graph path from input
 import ast
+import os
 import re
 import sys
 
+# The graph tools are in the parent folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from CSRGraph import loadNodeIds
+from OutputFormats import readOutputFile
+
 # Graph path
 graphPath = "../" + str(sys.argv[1])
 
@@ -35,6 +42,9 @@ def main():
     # Keeps track of the line number
     lineNumber = 1
 
+    # Node labels -> node ids
+    nodeIds = loadNodeIds(graphPath)
+
     # Result of testing each time step
     testResult = open(graphPath +"/Data/" + tStamp + "-test-result.txt", "w")
 
@@ -42,79 +52,88 @@ def main():
     syntheticDataFile = open(syntheticDataPath, 'r')
     syntheticDataFileLines = syntheticDataFile.readlines()
 
-    # Open the output file
-    with open(outputPath, 'r') as outPutFile:
+    # Columnar output files (.comps) hold the components of each time step as node ids, no parsing needed
+    componentsFile = readOutputFile(outputPath)
 
-        # List of the active components per time step extracted from the output file
-        outPutComponentList = []
+    if componentsFile is not None:
+        testFailed = testComponentsFile(componentsFile, syntheticDataFileLines, nodeIds, testResult)
+    else:
+        # Open the output file
+        with open(outputPath, 'r') as outPutFile:
 
-        # List of the active components per time step extracted from the synthetic data file
-        dataComponentList = []
+            # List of the active components per time step extracted from the output file
+            outPutComponentList = []
 
-        # Keeps track of the current time step
-        currentTS = ""
+            # List of the active components per time step extracted from the synthetic data file
+            dataComponentList = []
 
-        for line in outPutFile:
-            print("line number: " + str(lineNumber))
+            # Keeps track of the current time step
+            currentTS = ""
 
-            # Strip line from output file
-            strippedLine = line.strip()
+            for line in outPutFile:
+                print("line number: " + str(lineNumber))
 
-            # Extract the time step number
-            if strippedLine.startswith('ts_'):
-                currentTS = strippedLine
+                # Strip line from output file
+                strippedLine = line.strip()
 
-            # If this is a line of an active component, do the following:
-            if strippedLine[0] == "{":
-                print(strippedLine)
+                # Extract the time step number
+                if strippedLine.startswith('ts_'):
+                    currentTS = strippedLine
 
-                # Extract active component from the output file (always starts with '{')
-                component_output = ast.literal_eval("[" + strippedLine[1:len(strippedLine) - 1] + "]")
-                print("converted to list")
+                # If this is a line of an active component, do the following:
+                if strippedLine[0] == "{":
+                    print(strippedLine)
 
-                # Sort the active component
-                component_output.sort()
+                    # Extract active component from the output file (always starts with '{')
+                    component_output = ast.literal_eval("[" + strippedLine[1:len(strippedLine) - 1] + "]")
+                    component_output = nodeIds.ids(component_output).tolist()
+                    print("converted to list")
 
-                # Extract the active component from BFS output
+                    # Sort the active component
+                    component_output.sort()
 
+                    # Extract the active component from BFS output
 
-                # Extract the active component from the synthetic data file
-                strippedLine_data = syntheticDataFileLines[lineNumber - 1].strip()
-                print("synthetic data: ")
-                print(strippedLine_data)
-                component_data = ast.literal_eval("[" + strippedLine_data[1:len(strippedLine_data) - 1] + "]")
 
-                # Sort the active component
-                # print(component_data)
-                component_data.sort()
+                    # Extract the active component from the synthetic data file
+                    strippedLine_data = syntheticDataFileLines[lineNumber - 1].strip()
+                    print("synthetic data: ")
+                    print(strippedLine_data)
+                    component_data = ast.literal_eval("[" + strippedLine_data[1:len(strippedLine_data) - 1] + "]")
+                    component_data = nodeIds.ids(component_data).tolist()
 
-                # Aggregate active components to their respective lists
-                outPutComponentList.append(component_output)
-                dataComponentList.append(component_data)
+                    # Sort the active component
+                    # print(component_data)
+                    component_data.sort()
 
-            # If this is not a line of an active component, do the following:
-            else:
-                # if any active component was found in the current time step:
-                if len(outPutComponentList) > 0 or len(dataComponentList) > 0:
+                    # Aggregate active components to their respective lists
+                    outPutComponentList.append(component_output)
+                    dataComponentList.append(component_data)
 
-                    # Write each active component for each time step
-                    testResult.write(currentTS + "\n")
-                    testResult.write("Output List: line " + str(lineNumber) + ":\n" + str(outPutComponentList) + "\n")
-                    testResult.write("Data List: line " + str(lineNumber) + ":\n" + str(dataComponentList) + "\n")
+                # If this is not a line of an active component, do the following:
+                else:
+                    # if any active component was found in the current time step:
+                    if len(outPutComponentList) > 0 or len(dataComponentList) > 0:
 
-                    # Compare the active components found in the output file and the synthetic data file
-                    if sorted(outPutComponentList) == sorted(dataComponentList):
-                        testResult.write("Match!\n--------------------\n")
-                    else:
-                        testResult.write("Fail!\n--------------------\n")
-                        testFailed = True
+                        # Write each active component for each time step
+                        testResult.write(currentTS + "\n")
+                        testResult.write("Output List: line " + str(lineNumber) + ":\n" + str(outPutComponentList) +
+                                         "\n")
+                        testResult.write("Data List: line " + str(lineNumber) + ":\n" + str(dataComponentList) + "\n")
 
-                    outPutComponentList = []
-                    dataComponentList = []
+                        # Compare the active components found in the output file and the synthetic data file
+                        if sorted(outPutComponentList) == sorted(dataComponentList):
+                            testResult.write("Match!\n--------------------\n")
+                        else:
+                            testResult.write("Fail!\n--------------------\n")
+                            testFailed = True
 
-                # if no active components were found in current time stamp, simply move to the next line.
+                        outPutComponentList = []
+                        dataComponentList = []
 
-            lineNumber = lineNumber + 1
+                    # if no active components were found in current time stamp, simply move to the next line.
+
+                lineNumber = lineNumber + 1
 
     testResult.close()
     syntheticDataFile.close()
@@ -126,4 +145,47 @@ def main():
         print("Success!")
 
 
+# Compare a columnar output file with the synthetic data file, one time step at a time.
+#
+# @param componentsFile OutputFormats.ComponentsFile
+# @param syntheticDataFileLines lines of the synthetic data file
+# @param nodeIds NodeIds of the graph
+# @param testResult open file the result of each time step is written to
+# @return True if any time step does not match
+def testComponentsFile(componentsFile, syntheticDataFileLines, nodeIds, testResult):
+    testFailed = False
+
+    # Sorted active components of each time step of the synthetic data file
+    dataComponents = {}
+    currentTS = None
+
+    for line in syntheticDataFileLines:
+        strippedLine = line.strip()
+
+        if strippedLine.startswith('ts_'):
+            currentTS = int(strippedLine[3:].rstrip(':'))
+            dataComponents[currentTS] = []
+
+        elif strippedLine.startswith('{'):
+            component_data = ast.literal_eval("[" + strippedLine[1:len(strippedLine) - 1] + "]")
+            dataComponents[currentTS].append(sorted(nodeIds.ids(component_data).tolist()))
+
+    for t in range(componentsFile.numOfSteps):
+        outPutComponentList = sorted(sorted(component.tolist()) for component in componentsFile.stepComponents(t))
+        dataComponentList = sorted(dataComponents.get(t, []))
+
+        if len(outPutComponentList) > 0 or len(dataComponentList) > 0:
+            testResult.write("ts_" + str(t) + ":\n")
+            testResult.write("Output List:\n" + str(outPutComponentList) + "\n")
+            testResult.write("Data List:\n" + str(dataComponentList) + "\n")
+
+            if outPutComponentList == dataComponentList:
+                testResult.write("Match!\n--------------------\n")
+            else:
+                testResult.write("Fail!\n--------------------\n")
+                testFailed = True
+
+    return testFailed
+
+
 main()
\ No newline at end of file